@@ -0,0 +1,245 @@
+"""
+Shared resources for the page modules: registry, data refresher and long-lived indexes
+"""
+import os
+import time
+from datetime import datetime
+import pandas as pd
+import streamlit as st
+from utils.aggregates import CUBE_BREAKDOWNS, AggregateCube, build_cube
+from utils.aging import AgingIndex
+from utils.data_loader import CHUNK_ROWS, SheetSyncEngine, load_all_sheets, load_with_shared_cache, load_with_snapshots
+from utils.forecasting import ForecastEngine
+from utils.locations import load_registry
+from utils.money import Money
+from utils.perf import span
+from utils.refresher import BackgroundRefresher
+from utils.tables import TableIndex
+from utils.tax import build_tax_rollups
+
+SHEET_NAMES = ["Payments", "Master_Income", "Expenses"]
+CUBE_SOURCES = dict(zip(SHEET_NAMES, ["payments", "master", "expenses"]))
+REFRESH_TTL = 300
+# While a cold load streams in, pages get a partial bundle at most this often
+PARTIAL_PUBLISH_SECONDS = 3
+
+# Replicas behind a load balancer share frames (and one Sheets fetch) when this is set,
+# e.g. EMG_SHARED_CACHE=/dev/shm/emg or redis://cache:6379/0 (see utils/shared_cache.py)
+SHARED_CACHE_URL = os.environ.get("EMG_SHARED_CACHE")
+
+# Location registry: [locations] in secrets, optionally pointing at a sheet (sheet = "Locations").
+# Failures raise out of the cached function, so the defaults are never cached in its place
+@st.cache_resource(ttl=3600)
+def _configured_registry():
+    config = st.secrets.get("locations", {})
+    sheet_name = config.get("sheet")
+    sheet_frame = load_all_sheets([sheet_name])[sheet_name] if sheet_name else None
+    return load_registry(config, sheet_frame)
+
+def get_registry_status():
+    """(registry, error): the configured registry, or the defaults and why it couldn't be loaded"""
+    try:
+        return _configured_registry(), None
+    except Exception as e:
+        return load_registry(), str(e)
+
+def get_registry():
+    return get_registry_status()[0]
+
+def build_bundle(frames, engine, registry, cube=None, loading=None):
+    """Everything the pages read, derived once per data load
+
+    `cube` is one already fed from streamed chunks; `loading` is the stream's
+    progress when the frames are only partly loaded.
+    """
+    with span('bundle.categorize'):
+        payments, master, expenses = (registry.categorize(frames[name].copy()) for name in SHEET_NAMES)
+    if cube is None:
+        cube = build_cube(payments, master, expenses, registry.doctor_locations)
+    with span('bundle.indexes', rows=len(payments) + len(master) + len(expenses)):
+        location_index = {'payments': registry.build_index(payments), 'master': registry.build_index(master)}
+        # Presorted indexes so paginated tables never sort on a rerun
+        tables = {'payments': TableIndex(payments), 'master': TableIndex(master), 'expenses': TableIndex(expenses)}
+    return {
+        'payments': payments,
+        'master': master,
+        'expenses': expenses,
+        'cube': cube,
+        'location_index': location_index,
+        'tables': tables,
+        # Fiscal year/quarter rollups so the Tax Center never rescans the frames
+        'tax': build_tax_rollups(payments, expenses),
+        # Non-blank amount cells that didn't parse, by sheet: [[sheet row, raw text], ...]
+        'amount_errors': engine.amount_errors(),
+        'version': engine.version,
+        # Cache key for data derived from this bundle; the version alone restarts with a new engine
+        'data_version': (engine.id, engine.version),
+        # Changes when rows may have been edited or deleted, not just appended; the engine id
+        # keeps it unique when a new engine restarts the count (long-lived indexes outlive engines)
+        'generation': (engine.id, engine.generation),
+        'fetched_at': engine.fetched_at,
+        'loading': loading,
+    }
+
+class ChunkFeed:
+    """on_chunk callback for streamed loads: keeps a running cube and publishes partial bundles
+
+    Each chunk only adds to the cube's base groupby; the roll-ups are derived
+    when a partial bundle is published and once for the final cube.
+
+    Partial bundles are only published on a cold start (`publish_partials`),
+    never over data that is already being served.
+    """
+
+    def __init__(self, engine, registry, publish, publish_partials):
+        self.engine = engine
+        self.registry = registry
+        self.publish = publish if publish_partials else None
+        self.cube = AggregateCube({}, registry.doctor_locations, CUBE_BREAKDOWNS)
+        self.streamed = set()
+        self._published_at = None
+
+    def __call__(self, name, chunk, progress, partial_frames):
+        with span('bundle.cube_chunk', rows=len(chunk)):
+            self.cube.add(CUBE_SOURCES[name], chunk)
+        self.streamed.add(name)
+        if self.publish is None or all(p['done'] for p in progress.values()):
+            return
+        # Wait until every sheet has its first chunk, then refresh the partial view now and then
+        if not all(p['rows'] or p['done'] for p in progress.values()):
+            return
+        if self._published_at is not None and time.monotonic() - self._published_at < PARTIAL_PUBLISH_SECONDS:
+            return
+        loading = {sheet: dict(p) for sheet, p in progress.items()}
+        self.publish(build_bundle(partial_frames(), self.engine, self.registry, self.cube.copy(), loading))
+        self._published_at = time.monotonic()
+
+    def final_cube(self):
+        """The running cube, rolled up, if every sheet was streamed in full this load, else None"""
+        if self.streamed != set(SHEET_NAMES):
+            return None
+        self.cube.rollup()
+        return self.cube
+
+@st.cache_resource
+def get_shared_cache():
+    if not SHARED_CACHE_URL:
+        return None
+    from utils.shared_cache import open_shared_cache
+    return open_shared_cache(SHARED_CACHE_URL)
+
+def get_refresher(registry):
+    """The process-wide refresher for this registry (a changed doctor -> location map gets a new one)"""
+    return _refresher(registry, registry.fingerprint)
+
+# Keyed on the fingerprint, since the cube and location indexes bake in the doctor -> location map
+@st.cache_resource(max_entries=1)
+def _refresher(_registry, fingerprint):
+    # Full reloads stream in row chunks, so huge sheets never exist as one list of strings
+    engine = SheetSyncEngine(SHEET_NAMES, chunk_rows=CHUNK_ROWS)
+    shared_cache = get_shared_cache()
+    built = {}
+
+    def bundle_for(frames, cube=None):
+        # Unchanged data keeps every derived structure; only the fetch time moves
+        current = built.get('bundle')
+        if current is not None and current['version'] == engine.version:
+            return dict(current, fetched_at=engine.fetched_at)
+        built['bundle'] = build_bundle(frames, engine, _registry, cube=cube)
+        return built['bundle']
+
+    def fetch(publish, force_full=False):
+        if shared_cache is not None:
+            # One replica fetches from Sheets; the rest read the frames it publishes
+            return bundle_for(load_with_shared_cache(engine, shared_cache, ttl=REFRESH_TTL, force_full=force_full))
+        # Cold start serves the local snapshot; its background revalidation publishes fresher data.
+        # Without one, the first chunks of a streamed load are published before the rest arrive
+        feed = ChunkFeed(engine, _registry, publish, publish_partials=not engine.has_state)
+        frames = load_with_snapshots(engine, on_refresh=lambda fresh: publish(bundle_for(fresh)), on_chunk=feed,
+                                     force_full=force_full)
+        return bundle_for(frames, cube=feed.final_cube())
+
+    return BackgroundRefresher(fetch, ttl=REFRESH_TTL, version_of=lambda bundle: bundle['version'])
+
+@st.cache_resource
+def get_forecast_engine():
+    # Keeps the per-doctor monthly series between reruns; only new payments are folded in
+    return ForecastEngine()
+
+def get_aging_index(registry):
+    return _aging_index(registry, registry.fingerprint)
+
+@st.cache_resource(max_entries=1)
+def _aging_index(_registry, fingerprint):
+    # Pending items stay sorted between reruns; status changes and new rows are applied in place
+    return AgingIndex(_registry.doctor_locations)
+
+def get_data():
+    """The current data bundle (sessions read the last good one; refreshes run in the background)"""
+    refresher = get_refresher(get_registry())
+    with span('data.get'):
+        return refresher.get()
+
+def render_data_status():
+    """Refresh button, data age and load errors; stops the run when nothing has loaded yet"""
+    refresher = get_refresher(get_registry())
+    data = get_data()
+
+    col1, col2 = st.columns([1, 5])
+    if col1.button("🔄 Refresh Data"):
+        # A manual refresh re-reads every sheet, so edits anywhere show up; concurrent
+        # clicks share one fetch and only this session waits for it
+        refresher.request_refresh(force_full=True).wait(timeout=30)
+        st.rerun()
+    if data is not None and data['fetched_at']:
+        age_minutes = (datetime.now().timestamp() - data['fetched_at']) / 60
+        status = " · refreshing…" if refresher.refreshing else ""
+        col2.caption(f"Data as of {datetime.fromtimestamp(data['fetched_at']):%Y-%m-%d %H:%M} ({age_minutes:.0f} min ago){status}")
+
+    if data is None:
+        st.error(f"Error loading data: {refresher.last_error or 'no data loaded yet'}")
+        st.stop()
+    if data['loading']:
+        loaded = sum(p['rows'] for p in data['loading'].values())
+        expected = sum(p['expected'] or p['rows'] for p in data['loading'].values())
+        st.progress(min(loaded / expected, 1.0) if expected else 0.0,
+                    text=f"Loading sheets… {loaded:,} of ~{expected:,} rows; figures below are partial")
+        _rerun_when_loaded()
+    if refresher.last_error:
+        st.warning(f"Showing last good data; refresh failed: {refresher.last_error}")
+    bad_cells = {name: rows for name, rows in data.get('amount_errors', {}).items() if rows}
+    if bad_cells:
+        count = sum(len(rows) for rows in bad_cells.values())
+        with st.expander(f"⚠️ {count:,} amount cell{'s' if count != 1 else ''} couldn't be read and {'are' if count != 1 else 'is'} left out of totals"):
+            for name, rows in bad_cells.items():
+                st.markdown(f"**{name}**")
+                st.dataframe(pd.DataFrame(rows, columns=['Sheet row', 'Amount as entered']), hide_index=True)
+    return data
+
+@st.fragment(run_every=2)
+def _rerun_when_loaded():
+    # Polls while a streamed load is arriving; the whole page reruns once it is complete
+    data = get_data()
+    if data is not None and not data['loading']:
+        st.rerun(scope="app")
+
+def location_rows(data, location, source='payments'):
+    """Row positions for a location from the index built at load time (None = no Doctor column)"""
+    index = data['location_index'][source]
+    return index[location] if index is not None else None
+
+def get_metrics(data, location=None):
+    """Card metrics for one location (or all) read straight from the cube"""
+    cube = data['cube']
+    try:
+        with span('metrics.cards'):
+            return {
+                'total_received': cube.total('payments', location=location),
+                'avg_payment': cube.mean('payments', location=location),
+                'month_received': cube.total('payments', location=location, month=datetime.now().strftime('%Y-%m')),
+                'pending': cube.total('master', location=location, status='Pending'),
+                'projected': cube.total('master', location=location, status='Projected')
+            }
+    except Exception as e:
+        st.warning(f"Metrics calculation issue: {e}")
+        return {name: Money(0) for name in ('total_received', 'avg_payment', 'month_received', 'pending', 'projected')}
@@ -0,0 +1,32 @@
+"""
+Expense Tracker: totals, category breakdown and the expense log
+"""
+import streamlit as st
+from app_pages.common import get_data
+from utils.money import AMOUNT_COLUMN, to_dollars
+from utils.tables import render_table
+
+data = get_data()
+expenses_df, cube = data['expenses'], data['cube']
+
+st.title("💸 Expense Tracker")
+
+if not expenses_df.empty and AMOUNT_COLUMN in expenses_df.columns:
+    total_expenses = cube.total('expenses')
+    monthly_avg = total_expenses.scale(1 / 12)
+    
+    st.markdown("### 💰 Expense Summary")
+    c1, c2 = st.columns(2)
+    c1.markdown(f"<div class='metric-card card-orange'><div class='card-title'>Total Expenses</div><div class='card-value'>${total_expenses:,.2f}</div></div>", unsafe_allow_html=True)
+    c2.markdown(f"<div class='metric-card card-purple'><div class='card-title'>Monthly Avg</div><div class='card-value'>${monthly_avg:,.2f}</div></div>", unsafe_allow_html=True)
+    
+    # Category breakdown
+    if 'Category' in expenses_df.columns:
+        st.markdown("### 📂 Expenses by Category")
+        category_summary = cube.breakdown('expenses', 'Category')
+        st.bar_chart(to_dollars(category_summary))
+    
+    st.markdown("### 📋 Expense Details")
+    render_table(expenses_df, data['tables']['expenses'], key="expense_log")
+else:
+    st.info("No expense data available.")
@@ -0,0 +1,44 @@
+"""
+Future Income: projected items and the per-doctor forecast
+"""
+import streamlit as st
+from app_pages.common import get_data, get_forecast_engine
+from utils.charts import create_forecast_chart
+from utils.forecasting import METHODS
+from utils.tables import render_table
+
+data = get_data()
+payments_df, master_df, cube = data['payments'], data['master'], data['cube']
+
+st.title("📈 Future Income Projections")
+
+if not master_df.empty:
+    if cube.count('master', status='Projected'):
+        total_projected = cube.total('master', status='Projected')
+        count_projected = cube.count('master', status='Projected')
+        
+        st.markdown("### 📊 Projected Income Summary")
+        c1, c2 = st.columns(2)
+        c1.markdown(f"<div class='metric-card card-blue'><div class='card-title'>Total Projected</div><div class='card-value'>${total_projected:,.2f}</div></div>", unsafe_allow_html=True)
+        c2.markdown(f"<div class='metric-card card-teal'><div class='card-title'>Upcoming Items</div><div class='card-value'>{count_projected}</div></div>", unsafe_allow_html=True)
+        
+        st.markdown("### 📅 Upcoming Income")
+        render_table(master_df, data['tables']['master'], key="projected", filters={'Status': ['Projected']}, ascending=True)
+    else:
+        st.info("No projected income data available.")
+else:
+    st.info("No master income data available.")
+
+if not payments_df.empty:
+    st.markdown("### 🔮 Per-Doctor Forecast")
+    col1, col2 = st.columns(2)
+    method = col1.selectbox("Method", list(METHODS), format_func=METHODS.get)
+    horizon = col2.slider("Months ahead", 1, 12, 3)
+    
+    forecast_df = get_forecast_engine().update(payments_df, generation=data['generation']).forecast(horizon=horizon, method=method)
+    if not forecast_df.empty:
+        st.plotly_chart(create_forecast_chart(forecast_df), use_container_width=True)
+        st.dataframe(
+            forecast_df.pivot(index='Doctor', columns='Month', values='Forecast').style.format("${:,.2f}"),
+            use_container_width=True
+        )
@@ -0,0 +1,39 @@
+"""
+Home: combined earnings, per-location totals, charts and the payment log
+"""
+import streamlit as st
+from app_pages.common import get_data, get_metrics, get_registry
+from utils.charts import create_income_breakdown, create_payment_timeline
+from utils.tables import render_table
+
+registry = get_registry()
+data = get_data()
+payments_df, master_df, cube, tables = data['payments'], data['master'], data['cube'], data['tables']
+
+st.title("💰 EMG Payment Dashboard")
+
+all_metrics = get_metrics(data)
+
+st.markdown("### 📊 Combined Earnings Overview")
+c1, c2, c3, c4 = st.columns(4)
+c1.markdown(f"<div class='metric-card card-teal'><div class='card-title'>Total Earnings</div><div class='card-value'>${all_metrics['total_received']:,.2f}</div></div>", unsafe_allow_html=True)
+c2.markdown(f"<div class='metric-card card-purple'><div class='card-title'>Pending</div><div class='card-value'>${all_metrics['pending']:,.2f}</div></div>", unsafe_allow_html=True)
+c3.markdown(f"<div class='metric-card card-blue'><div class='card-title'>Projected</div><div class='card-value'>${all_metrics['projected']:,.2f}</div></div>", unsafe_allow_html=True)
+c4.markdown(f"<div class='metric-card card-pink'><div class='card-title'>This Month</div><div class='card-value'>${all_metrics['month_received']:,.2f}</div></div>", unsafe_allow_html=True)
+
+st.markdown("### 💼 Income by Location")
+location_colors = ['card-orange', 'card-pink', 'card-teal', 'card-purple', 'card-blue']
+for i, (col, key) in enumerate(zip(st.columns(len(registry.keys)), registry.keys)):
+    col.markdown(f"<div class='metric-card {location_colors[i % len(location_colors)]}'><div class='card-title'>{registry.label(key)} Total</div><div class='card-value'>${cube.total('payments', location=key):,.2f}</div></div>", unsafe_allow_html=True)
+
+if not payments_df.empty:
+    st.markdown("### 📈 Charts")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(create_payment_timeline(payments_df, master_df, data_version=data['data_version']), use_container_width=True)
+    with col2:
+        st.subheader("Income by Doctor")
+        st.plotly_chart(create_income_breakdown(payments_df, data_version=data['data_version']), use_container_width=True)
+    
+    st.markdown("### 📋 Payment Log")
+    render_table(payments_df, tables['payments'], key="home_log")
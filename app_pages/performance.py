@@ -0,0 +1,45 @@
+"""
+Performance (hidden, ?perf=1): stage percentiles, cache stats, slowest reruns and profiling
+"""
+import streamlit as st
+from app_pages.common import get_data, get_refresher, get_registry
+from utils.figure_cache import figure_cache
+from utils.perf import perf
+
+data = get_data()
+refresher = get_refresher(get_registry())
+
+st.title("⚙️ Performance")
+
+fig_stats = figure_cache.stats()
+st.markdown("### 🗃️ Caches")
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Figure cache hit rate", f"{fig_stats['hit_rate']:.0%}", help=f"{fig_stats['hits']} hits / {fig_stats['misses']} misses")
+c2.metric("Cached figures", fig_stats['entries'], help=f"{fig_stats['evictions']} evictions")
+c3.metric("Figure cache size", f"{fig_stats['bytes'] / 2 ** 20:.1f} MB")
+c4.metric("Data version", data['version'], help=f"Refreshed {refresher.age or 0:.0f}s ago")
+
+st.markdown("### ⏱️ Stages")
+st.caption("Durations of instrumented stages over the recent sample window (background refreshes included)")
+st.dataframe(perf.stage_summary().style.format("{:,.2f}", na_rep="–"), use_container_width=True)
+
+st.markdown("### 🐢 Slowest Reruns")
+slowest = perf.slowest_reruns(10)
+if not slowest.empty:
+    st.dataframe(slowest.style.format({'Total ms': "{:,.1f}"}), use_container_width=True, hide_index=True)
+else:
+    st.info("No completed reruns recorded yet.")
+
+st.markdown("### 🔬 Profile")
+col1, col2 = st.columns(2)
+if col1.button("Profile the next page I open"):
+    st.session_state["perf_profile_armed"] = True
+if col2.button("Clear samples"):
+    perf.clear()
+if st.session_state.get("perf_profile_armed"):
+    st.info("Armed: the next rerun of another page will be profiled.")
+report = st.session_state.get("perf_profile_report")
+if report:
+    profiled_page, backend, text = report
+    st.caption(f"{backend} report for {profiled_page}")
+    st.code(text, language=None)
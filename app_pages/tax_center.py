@@ -0,0 +1,58 @@
+"""
+Tax Center: income, deductible expenses and tax estimates per fiscal year and quarter
+"""
+import pandas as pd
+import streamlit as st
+from app_pages.common import get_data
+from utils.money import to_dollars
+
+data = get_data()
+tax = data['tax']
+
+st.title("📊 Tax Center")
+
+if tax.years:
+    col1, col2 = st.columns(2)
+    year = col1.selectbox("Tax year", tax.years[::-1])
+    period_label = col2.radio("Period", ["Full year", "Q1", "Q2", "Q3", "Q4"], horizontal=True)
+    quarter = None if period_label == "Full year" else int(period_label[1])
+    period = tax.period(year, quarter)
+    
+    st.markdown(f"### 💼 Income & Expenses · {year}{'' if quarter is None else f' Q{quarter}'}")
+    c1, c2, c3 = st.columns(3)
+    c1.markdown(f"<div class='metric-card card-teal'><div class='card-title'>Gross Income</div><div class='card-value'>${period['income']:,.2f}</div></div>", unsafe_allow_html=True)
+    c2.markdown(f"<div class='metric-card card-orange'><div class='card-title'>Deductible Expenses</div><div class='card-value'>${period['deductible']:,.2f}</div></div>", unsafe_allow_html=True)
+    c3.markdown(f"<div class='metric-card card-blue'><div class='card-title'>Net Income</div><div class='card-value'>${period['net']:,.2f}</div></div>", unsafe_allow_html=True)
+    
+    categories = tax.categories(year, quarter)
+    if not categories.empty:
+        st.markdown("### 📂 Expenses by Category")
+        st.bar_chart(to_dollars(categories))
+    
+    complete = tax.is_complete(year)
+    estimate = tax.estimate(year, annualized=not complete)
+    st.markdown(f"### 🧾 Estimated Tax for {year}")
+    if not complete:
+        st.caption("Year in progress: projected from the year-to-date run rate.")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.markdown(f"<div class='metric-card card-purple'><div class='card-title'>Total ({estimate['effective_rate']:.1%} effective)</div><div class='card-value'>${estimate['total']:,.2f}</div></div>", unsafe_allow_html=True)
+    c2.markdown(f"<div class='metric-card card-blue'><div class='card-title'>Federal</div><div class='card-value'>${estimate['federal']:,.2f}</div></div>", unsafe_allow_html=True)
+    c3.markdown(f"<div class='metric-card card-pink'><div class='card-title'>Ontario</div><div class='card-value'>${estimate['ontario']:,.2f}</div></div>", unsafe_allow_html=True)
+    c4.markdown(f"<div class='metric-card card-orange'><div class='card-title'>CPP (self-employed)</div><div class='card-value'>${estimate['cpp']:,.2f}</div></div>", unsafe_allow_html=True)
+    
+    installments = tax.installments(year)
+    st.markdown("### 📅 Quarterly Installments")
+    if not installments.empty:
+        st.dataframe(installments.assign(**to_dollars(installments[['Current-year', 'Prior-year']])).style.format({'Current-year': "${:,.2f}", 'Prior-year': "${:,.2f}"}), use_container_width=True, hide_index=True)
+        st.caption("Either option avoids instalment interest; the prior-year option uses last year's estimate.")
+    else:
+        st.info("No installments needed: estimated tax is under the $3,000 threshold.")
+    
+    if quarter is None and len(tax.years) > 1:
+        st.markdown("### 📈 Year over Year")
+        st.dataframe(
+            to_dollars(pd.DataFrame({y: {**tax.period(y), 'tax': tax.estimate(y)['total']} for y in tax.years}, dtype='int64').T).style.format("${:,.2f}"),
+            use_container_width=True
+        )
+else:
+    st.info("No payment data available.")
@@ -0,0 +1,36 @@
+"""
+Location income tracker; one navigation page per registry entry
+"""
+import streamlit as st
+from app_pages.common import get_data, get_metrics, get_registry, location_rows
+from utils.tables import render_table
+
+def render(location):
+    registry = get_registry()
+    data = get_data()
+    label = registry.label(location)
+    doctors = registry.doctors(location)
+    st.title(f"{registry.icon(location)} {label} Income Tracker")
+    st.markdown(f"**{'Doctors' if len(doctors) > 1 else 'Doctor'}:** {' & '.join(doctors)}")
+    
+    loc_rows = location_rows(data, location)
+    loc_metrics = get_metrics(data, location)
+    
+    st.markdown(f"### 📊 {label} Earnings Overview")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.markdown(f"<div class='metric-card card-teal'><div class='card-title'>Total</div><div class='card-value'>${loc_metrics['total_received']:,.2f}</div></div>", unsafe_allow_html=True)
+    c2.markdown(f"<div class='metric-card card-purple'><div class='card-title'>Pending</div><div class='card-value'>${loc_metrics['pending']:,.2f}</div></div>", unsafe_allow_html=True)
+    c3.markdown(f"<div class='metric-card card-blue'><div class='card-title'>Projected</div><div class='card-value'>${loc_metrics['projected']:,.2f}</div></div>", unsafe_allow_html=True)
+    c4.markdown(f"<div class='metric-card card-pink'><div class='card-title'>Avg/Payment</div><div class='card-value'>${loc_metrics['avg_payment']:,.2f}</div></div>", unsafe_allow_html=True)
+    
+    if data['cube'].count('payments', location=location):
+        st.markdown(f"### 💳 {label} Payment Log")
+        render_table(data['payments'], data['tables']['payments'], key=f"{location}_log", subset=loc_rows)
+    else:
+        st.info(f"No {label} data available.")
+
+def page(location):
+    """st.Page for one location's tracker"""
+    registry = get_registry()
+    return st.Page(lambda: render(location), title=f"{registry.label(location)} Tracker",
+                   icon=registry.icon(location), url_path=f"{location}_tracker")
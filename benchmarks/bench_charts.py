@@ -0,0 +1,40 @@
+"""
+Benchmark: payment timeline build time and JSON payload, full vs downsampled
+
+Run from the repo root:  python -m benchmarks.bench_charts [rows ...]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from utils.charts import create_payment_timeline
+from utils.money import AMOUNT_COLUMN
+
+def make_frames(rows, seed=0):
+    """Normalized Payments / Master_Income frames with `rows` rows each"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 4000, rows), unit='D')
+    payments = pd.DataFrame({'Date': dates, AMOUNT_COLUMN: pd.array(np.rint(rng.gamma(2.0, 40_000.0, rows)).astype('int64'), dtype='Int64')})
+    master = payments.assign(Status=pd.Categorical(rng.choice(['Paid', 'Pending', 'Projected'], rows, p=[0.9, 0.07, 0.03])))
+    return payments, master
+
+def measure(payments, master, max_points):
+    start = time.perf_counter()
+    fig = create_payment_timeline(payments, master, max_points=max_points)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    payload = pio.to_json(fig, validate=False)
+    serialize = time.perf_counter() - start
+    return build, serialize, len(payload)
+
+def main(sizes=(1_000, 100_000, 1_000_000)):
+    print(f"{'rows':>10} {'mode':>12} {'build ms':>10} {'json ms':>10} {'json KB':>10}")
+    for rows in sizes:
+        payments, master = make_frames(rows)
+        for mode, max_points in (('full', None), ('downsampled', 2000)):
+            build, serialize, size = measure(payments, master, max_points)
+            print(f"{rows:>10,} {mode:>12} {build * 1000:>10.1f} {serialize * 1000:>10.1f} {size / 1024:>10.0f}")
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or (1_000, 100_000, 1_000_000))
@@ -0,0 +1,106 @@
+"""
+Benchmark: import cost of the app entry point and each page, and time to first render
+
+    python -m benchmarks.bench_imports [--repeat 5] [--rows 10000] [--no-render]
+
+Every measurement runs in a fresh interpreter so nothing is already in
+sys.modules; import cost is CPU time, which is steadier than wall time on a
+busy machine. "monolith" is the import set the single-script app loaded on
+every cold start before pages were split into modules.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MONOLITH = [
+    'streamlit', 'pandas', 'gspread', 'google.oauth2.service_account', 'plotly.express',
+    'utils.data_loader', 'utils.calculations', 'utils.aggregates', 'utils.locations', 'utils.charts',
+    'utils.forecasting', 'utils.figure_cache', 'utils.refresher', 'utils.aging', 'utils.tables',
+]
+ENTRY = ['streamlit', 'app_pages.common', 'app_pages.tracker', 'utils.figure_cache', 'utils.perf']
+# Modules each page module imports beyond the entry point's set
+PAGES = {
+    'home': ['utils.charts'],
+    'future_income': ['utils.charts'],
+    'receivables': [],
+    'expenses': [],
+    'tax_center': [],
+}
+HEAVY = ['gspread', 'google.oauth2', 'plotly.express']
+
+IMPORT_SNIPPET = """
+import importlib, json, sys, time
+start = time.process_time()
+for name in {modules!r}:
+    importlib.import_module(name)
+print(json.dumps({{'seconds': time.process_time() - start,
+                   'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+RENDER_SNIPPET = """
+import json, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+if {page!r}:
+    at.switch_page({page!r})
+start = time.perf_counter()
+at.run()
+print(json.dumps({{'seconds': time.perf_counter() - start, 'errors': [str(e.value) for e in at.exception]}}))
+"""
+
+def _run(snippet, env=None):
+    result = subprocess.run([sys.executable, '-c', snippet], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def time_imports(modules, repeat):
+    runs = [_run(IMPORT_SNIPPET.format(modules=modules, heavy=HEAVY)) for _ in range(repeat)]
+    return min(run['seconds'] for run in runs), runs[0]['loaded']
+
+def seed_snapshots(rows, directory):
+    """Write snapshots of synthetic sheets so the app starts without network access"""
+    os.environ['EMG_SNAPSHOT_DIR'] = directory
+    from benchmarks.fake_sheets import FakeSpreadsheet
+    from benchmarks.synthetic import generate_sheets
+    from utils.data_loader import SheetSyncEngine, save_snapshots
+    engine = SheetSyncEngine(['Payments', 'Master_Income', 'Expenses'], FakeSpreadsheet(generate_sheets(rows)))
+    save_snapshots(engine, engine.sync())
+
+def time_first_render(page, repeat, env):
+    app = os.path.join(ROOT, 'streamlit_app.py')
+    runs = [_run(RENDER_SNIPPET.format(app=app, page=page), env) for _ in range(repeat)]
+    errors = runs[0]['errors']
+    return min(run['seconds'] for run in runs), errors
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=10_000, help='synthetic rows for the first-render test')
+    parser.add_argument('--no-render', action='store_true', help='skip the AppTest first-render timings')
+    args = parser.parse_args()
+
+    print(f"{'import set':<28} {'CPU ms':>9}  heavy modules loaded")
+    monolith, loaded = time_imports(MONOLITH, args.repeat)
+    print(f"{'monolith (before split)':<28} {monolith * 1000:9.1f}  {', '.join(loaded) or '-'}")
+    entry, loaded = time_imports(ENTRY, args.repeat)
+    print(f"{'entry point':<28} {entry * 1000:9.1f}  {', '.join(loaded) or '-'}")
+    for page, extra in PAGES.items():
+        seconds, loaded = time_imports(ENTRY + extra, args.repeat)
+        print(f"{'entry + ' + page:<28} {seconds * 1000:9.1f}  {', '.join(loaded) or '-'}")
+
+    if args.no_render:
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        seed_snapshots(args.rows, directory)
+        env = dict(os.environ, EMG_SNAPSHOT_DIR=directory)
+        print(f"\n{'first render (cold process)':<28} {'ms':>9}")
+        for page in ['app_pages/home.py', 'app_pages/tax_center.py']:
+            seconds, errors = time_first_render(page, args.repeat, env)
+            print(f"{os.path.basename(page):<28} {seconds * 1000:9.1f}" + (f"  errors: {errors}" if errors else ''))
+
+if __name__ == '__main__':
+    main()
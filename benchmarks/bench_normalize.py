@@ -0,0 +1,67 @@
+"""
+Benchmark: legacy Amount/Date cleaning vs utils.normalize on a large messy sheet
+
+Run from the repo root:  python -m benchmarks.bench_normalize [rows]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from utils.normalize import normalize_currency, normalize_dates
+
+def make_messy_columns(rows, seed=0):
+    """Amount/Date string columns shaped like the real Payments tab"""
+    rng = np.random.default_rng(seed)
+    cents = rng.integers(1_000, 500_000, rows)
+    amounts = np.array([f"${c // 100:,}.{c % 100:02d}" for c in cents], dtype=object)
+    refunds = rng.random(rows) < 0.01
+    amounts[refunds] = [f"(CAD {a})" for a in amounts[refunds]]
+    amounts[(rng.random(rows) < 0.02) & ~refunds] = ''
+
+    days = pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 2500, rows), unit='D')
+    # Sheets renders dates as M/D/YYYY; some rows were pasted as ISO or typed by hand
+    dates = days.strftime('%m/%d/%Y').to_numpy(dtype=object)
+    iso = rng.random(rows) < 0.05
+    dates[iso] = days[iso].strftime('%Y-%m-%d')
+    typed = rng.random(rows) < 0.01
+    dates[typed] = days[typed].strftime('%b %d, %Y')
+    return pd.Series(amounts), pd.Series(dates)
+
+def legacy_clean(amount, date):
+    amount = amount.astype(str).str.replace('$', '', regex=False)
+    amount = amount.str.replace(',', '', regex=False)
+    amount = pd.to_numeric(amount, errors='coerce').fillna(0)
+    date = pd.to_datetime(date, format='mixed', errors='coerce')
+    return amount, date
+
+def new_clean(amount, date):
+    return normalize_currency(amount), normalize_dates(date)
+
+def best_of(func, *args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main(rows=100_000):
+    amount, date = make_messy_columns(rows)
+    legacy_time, (legacy_amount, legacy_date) = best_of(legacy_clean, amount, date)
+    new_time, (new_amount, new_date) = best_of(new_clean, amount, date)
+
+    # Legacy cleaning can't read "(CAD ...)" refunds and reads blanks as 0, so only compare the rest
+    blank = amount == ''
+    plain = ~amount.str.contains('(', regex=False) & ~blank
+    assert (np.rint(legacy_amount[plain].to_numpy() * 100) == new_amount[plain].to_numpy(dtype='int64')).all()
+    assert (new_amount[~plain & ~blank] < 0).all()
+    assert new_amount[blank].isna().all()
+    assert (legacy_date.fillna(pd.Timestamp(0)) == new_date.fillna(pd.Timestamp(0))).all()
+
+    print(f"rows:    {rows:,}")
+    print(f"legacy:  {legacy_time * 1000:8.1f} ms")
+    print(f"new:     {new_time * 1000:8.1f} ms")
+    print(f"speedup: {legacy_time / new_time:8.1f}x")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,57 @@
+"""
+Benchmark: N replicas loading the same sheets, each on its own vs through a shared cache
+
+    python -m benchmarks.bench_shared_cache [--replicas 4] [--rows 100000] [--latency 0.5]
+
+Each replica is a separate process with its own fake Sheets backend (so
+requests are counted per process). Without a cache every replica fetches;
+with the file-backed cache one replica holds the lease and fetches, and the
+others map the frames it publishes.
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+
+SHEET_NAMES = ['Payments', 'Master_Income', 'Expenses']
+
+def _replica(args):
+    rows, latency, directory, barrier = args
+    from benchmarks.fake_sheets import FakeSpreadsheet
+    from benchmarks.synthetic import generate_sheets
+    from utils.data_loader import SheetSyncEngine, load_with_shared_cache
+    from utils.shared_cache import open_shared_cache
+
+    spreadsheet = FakeSpreadsheet(generate_sheets(rows), latency=latency)
+    engine = SheetSyncEngine(SHEET_NAMES, spreadsheet)
+    cache = open_shared_cache(directory, lease_seconds=60) if directory else None
+    barrier.wait()
+    start = time.perf_counter()
+    frames = load_with_shared_cache(engine, cache, wait=60) if cache else engine.sync()
+    seconds = time.perf_counter() - start
+    return spreadsheet.requests, seconds, sum(len(df) for df in frames.values())
+
+def run(replicas, rows, latency, directory):
+    with multiprocessing.Manager() as manager:
+        barrier = manager.Barrier(replicas)
+        with multiprocessing.Pool(replicas) as pool:
+            return pool.map(_replica, [(rows, latency, directory, barrier)] * replicas)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--replicas', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds added per Sheets request')
+    args = parser.parse_args()
+
+    print(f"{'mode':<14} {'Sheets requests':>16} {'slowest load ms':>16} {'rows per replica':>17}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, cache_dir in (('independent', None), ('shared cache', directory)):
+            results = run(args.replicas, args.rows, args.latency, cache_dir)
+            requests = sum(r[0] for r in results)
+            slowest = max(r[1] for r in results)
+            rows = {r[2] for r in results}
+            print(f"{mode:<14} {requests:>16} {slowest * 1000:>16.1f} {', '.join(f'{n:,}' for n in rows):>17}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: one-shot vs chunked (streamed) sheet loading plus the aggregate cube, time and peak Python memory
+
+    python -m benchmarks.bench_streaming [rows ...] [--chunk-rows 20000] [--latency 0.2]
+
+Times come from an untraced run; peak memory from a second run under
+tracemalloc (which slows allocation-heavy code, the streamed load more than
+the one-shot). The peak includes the raw list-of-strings values the fake
+backend returns, which is what dominates a one-shot load. Streaming is not
+faster overall: it pays some total time for a lower peak and an early
+first chunk.
+Both modes end with the dashboard cube: the one-shot load builds it from the
+finished frames, the streamed load feeds every chunk into it as the app does.
+Before timing, streamed frames are checked against a one-shot load, including
+sheets with blank rows at chunk boundaries and a header-only sheet.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from benchmarks.fake_sheets import FakeSpreadsheet
+from benchmarks.synthetic import generate_sheets
+from utils.aggregates import CUBE_BREAKDOWNS, AggregateCube, build_cube
+from utils.data_loader import load_all_sheets, stream_sheets
+from utils.locations import DEFAULT_LOCATIONS, LocationRegistry
+
+SHEET_NAMES = ['Payments', 'Master_Income', 'Expenses']
+CUBE_SOURCES = dict(zip(SHEET_NAMES, ['payments', 'master', 'expenses']))
+DOCTOR_LOCATIONS = LocationRegistry(DEFAULT_LOCATIONS).doctor_locations
+
+def check_equivalence(rows, chunk_rows):
+    """Streamed loads must match load_all_sheets exactly, blank rows and empty sheets included"""
+    sheets = generate_sheets(rows)
+    width = len(sheets['Payments'][0])
+    # A blank row right at a chunk boundary, and a blank run longer than a whole chunk
+    for row in [chunk_rows, chunk_rows + 1, *range(2 * chunk_rows - 3, 3 * chunk_rows + 5)]:
+        if row < len(sheets['Payments']):
+            sheets['Payments'][row] = [''] * width
+    sheets['Expenses'] = sheets['Expenses'][:1]
+    expected = load_all_sheets(SHEET_NAMES, FakeSpreadsheet(sheets))
+    streamed, _ = stream_sheets(SHEET_NAMES, FakeSpreadsheet(sheets), chunk_rows)
+    for name in SHEET_NAMES:
+        assert streamed[name].equals(expected[name]), f"streamed {name} differs from a one-shot load"
+
+def one_shot(spreadsheet):
+    frames = load_all_sheets(SHEET_NAMES, spreadsheet)
+    build_cube(*frames.values(), DOCTOR_LOCATIONS)
+    return frames
+
+def streamed(spreadsheet, chunk_rows, first):
+    """Stream the sheets with every chunk fed into a cube, rolled up once at the end"""
+    cube = AggregateCube({}, DOCTOR_LOCATIONS, CUBE_BREAKDOWNS)
+
+    def on_chunk(name, chunk, progress, partial_frames):
+        if not first:
+            first.append(time.perf_counter())
+        cube.add(CUBE_SOURCES[name], chunk)
+
+    frames, _ = stream_sheets(SHEET_NAMES, spreadsheet, chunk_rows, on_chunk=on_chunk)
+    cube.rollup()
+    return frames
+
+def measure(load):
+    gc.collect()
+    start = time.perf_counter()
+    first = []
+    frames = load(first)
+    seconds = time.perf_counter() - start
+    del frames
+    gc.collect()
+    tracemalloc.start()
+    frames = load([])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    final = sum(df.memory_usage(deep=True).sum() for df in frames.values())
+    return seconds, (first[0] - start) if first else seconds, peak, final
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('rows', nargs='*', type=int, default=[100_000, 500_000])
+    parser.add_argument('--chunk-rows', type=int, default=20_000)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added per Sheets request')
+    args = parser.parse_args()
+
+    check_equivalence(5 * args.chunk_rows // 10, args.chunk_rows // 10)
+
+    print(f"{'rows':>10} {'mode':>10} {'total ms':>10} {'first ms':>10} {'peak MB':>10} {'frames MB':>10}")
+    for rows in args.rows:
+        spreadsheet = FakeSpreadsheet(generate_sheets(rows), latency=args.latency)
+        modes = {
+            'one-shot': lambda first: one_shot(spreadsheet),
+            'streamed': lambda first: streamed(spreadsheet, args.chunk_rows, first),
+        }
+        for mode, load in modes.items():
+            seconds, first, peak, final = measure(load)
+            print(f"{rows:>10,} {mode:>10} {seconds * 1000:>10.1f} {first * 1000:>10.1f} "
+                  f"{peak / 2 ** 20:>10.1f} {final / 2 ** 20:>10.1f}")
+
+if __name__ == '__main__':
+    main()
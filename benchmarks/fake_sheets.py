@@ -0,0 +1,88 @@
+"""
+Local stand-in for a gspread Spreadsheet with configurable latency (no network)
+"""
+import re
+import time
+from gspread.utils import a1_to_rowcol
+
+# 'Sheet Name'!A5:D  |  'Sheet Name'!A1:D1  |  'Sheet Name'
+_RANGE = re.compile(r"^'(?P<name>(?:[^']|'')+)'(?:!(?P<start>[A-Z]+\d+)(?::(?P<end>[A-Z]+)(?P<end_row>\d*))?)?$")
+# 'Sheet Name'!5:20000 (whole rows)
+_ROWS = re.compile(r"^'(?P<name>(?:[^']|'')+)'!(?P<first>\d+):(?P<last>\d+)$")
+
+def _trim(row):
+    row = list(row)
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, name):
+        self.spreadsheet = spreadsheet
+        self.title = name
+
+    @property
+    def row_count(self):
+        return len(self.spreadsheet.sheets[self.title])
+
+    def get_all_values(self):
+        return self.spreadsheet.values_batch_get([f"'{self.title}'"])['valueRanges'][0].get('values', [])
+
+class FakeSpreadsheet:
+    """Serves in-memory sheet values through gspread's values_batch_get interface
+
+    `latency` is added per request (auth/metadata/round trip) and
+    `per_cell_latency` per returned cell (transfer), so benchmarks can model
+    a slow network without touching one.
+    """
+
+    def __init__(self, sheets, latency=0.0, per_cell_latency=0.0):
+        self.sheets = sheets
+        self.latency = latency
+        self.per_cell_latency = per_cell_latency
+        self.requests = 0
+        self.cells_served = 0
+
+    def worksheet(self, name):
+        if name not in self.sheets:
+            raise KeyError(name)
+        return FakeWorksheet(self, name)
+
+    def fetch_sheet_metadata(self, params=None):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {'sheets': [{'properties': {'title': name, 'gridProperties': {'rowCount': len(values)}}}
+                           for name, values in self.sheets.items()]}
+
+    def _resolve(self, a1_range):
+        rows = _ROWS.match(a1_range)
+        if rows:
+            values = self.sheets[rows.group('name').replace("''", "'")]
+            return values[int(rows.group('first')) - 1:int(rows.group('last'))]
+        match = _RANGE.match(a1_range)
+        if not match:
+            raise ValueError(f"Unsupported range: {a1_range}")
+        values = self.sheets[match.group('name').replace("''", "'")]
+        if not match.group('start'):
+            return values
+        start_row, start_col = a1_to_rowcol(match.group('start'))
+        end_col = a1_to_rowcol(match.group('end') + '1')[1] if match.group('end') else start_col
+        end_row = int(match.group('end_row')) if match.group('end_row') else len(values)
+        return [row[start_col - 1:end_col] for row in values[start_row - 1:end_row]]
+
+    def values_batch_get(self, ranges, params=None):
+        self.requests += 1
+        value_ranges = []
+        cells = 0
+        for a1_range in ranges:
+            # Like the real API, trailing empty cells and rows are omitted
+            values = [_trim(row) if row and row[-1] == '' else row for row in self._resolve(a1_range)]
+            while values and not values[-1]:
+                values.pop()
+            cells += sum(len(row) for row in values)
+            value_ranges.append({'range': a1_range, 'values': values} if values else {'range': a1_range})
+        self.cells_served += cells
+        if self.latency or self.per_cell_latency:
+            time.sleep(self.latency + cells * self.per_cell_latency)
+        return {'valueRanges': value_ranges}
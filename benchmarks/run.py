@@ -0,0 +1,153 @@
+"""
+Benchmark suite: per-stage latency and peak memory on synthetic sheets, offline
+
+    python -m benchmarks.run                         # 1k, 10k, 100k rows
+    python -m benchmarks.run --rows 1000 1000000 --latency 0.2
+    python -m benchmarks.run --save bench_baseline.json
+    python -m benchmarks.run --compare bench_baseline.json --tolerance 0.3
+
+With --compare the exit status is 1 if any stage got slower (or used more
+memory) than the baseline by more than the tolerance, so it can gate a CI job.
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+from benchmarks.fake_sheets import FakeSpreadsheet
+from benchmarks.synthetic import append_rows, generate_sheets
+from utils.aggregates import build_cube
+from utils.aging import AgingIndex
+from utils.calculations import calculate_metrics
+from utils.charts import create_doctor_comparison, create_income_breakdown, create_monthly_trend, create_payment_timeline
+from utils.data_loader import SheetSyncEngine, load_all_sheets
+from utils.figure_cache import figure_cache
+from utils.locations import load_registry
+from utils.money import AMOUNT_COLUMN
+from utils.tables import TableIndex
+
+SHEET_NAMES = ['Payments', 'Master_Income', 'Expenses']
+
+def measure(func, repeat=3):
+    """(best seconds, peak traced bytes of one run, result) for func()"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak, result
+
+def run_size(rows, latency, repeat):
+    """All stages for one sheet size -> {stage: {'seconds', 'peak_bytes'}}"""
+    sheets = generate_sheets(rows)
+    registry = load_registry()
+    results = {}
+
+    def record(stage, func, stage_repeat=repeat):
+        seconds, peak, result = measure(func, stage_repeat)
+        results[stage] = {'seconds': seconds, 'peak_bytes': peak}
+        return result
+
+    spreadsheet = FakeSpreadsheet(sheets, latency=latency)
+    frames = record('load_all_sheets', lambda: load_all_sheets(SHEET_NAMES, spreadsheet))
+    payments, master, expenses = (registry.categorize(frames[name].copy()) for name in SHEET_NAMES)
+
+    def delta_sync():
+        engine = SheetSyncEngine(SHEET_NAMES, FakeSpreadsheet({k: list(v) for k, v in sheets.items()}, latency=latency))
+        engine.sync()
+        append_rows(engine.spreadsheet.sheets, max(rows // 100, 1))
+        start = time.perf_counter()
+        engine.sync()
+        return time.perf_counter() - start
+    # Only the second (delta) sync is of interest; time it from inside
+    delta_times = [delta_sync() for _ in range(repeat)]
+    results['sync_delta_1pct'] = {'seconds': min(delta_times), 'peak_bytes': None}
+
+    cube = record('build_cube', lambda: build_cube(payments, master, expenses, registry.doctor_locations))
+    month = datetime.now().strftime('%Y-%m')
+    record('cube_metrics', lambda: [
+        (cube.total('payments', location=key), cube.mean('payments', location=key),
+         cube.total('payments', location=key, month=month), cube.total('master', location=key, status='Pending'))
+        for key in [None] + registry.keys
+    ])
+    record('calculate_metrics', lambda: calculate_metrics(payments, master, master))
+    record('build_location_index', lambda: registry.build_index(payments))
+    table = record('build_table_index', lambda: TableIndex(payments))
+    record('table_query_page', lambda: table.query(AMOUNT_COLUMN, False, {'Doctor': ['Dr. Tripic']},
+                                                  amount_range=(10_000, 200_000))[:50])
+    record('build_aging_index', lambda: AgingIndex(registry.doctor_locations).sync(master))
+    record('aging_index_and_summary', lambda: AgingIndex(registry.doctor_locations).sync(master).summary('location'))
+
+    # Chart builders measured uncached: the cache is cleared before every run
+    def uncached(builder, *args):
+        def run():
+            figure_cache.clear()
+            return builder(*args)
+        return run
+    record('chart_timeline', uncached(create_payment_timeline, payments, master))
+    record('chart_income_breakdown', uncached(create_income_breakdown, payments))
+    record('chart_monthly_trend', uncached(create_monthly_trend, payments))
+    record('chart_doctor_comparison', uncached(create_doctor_comparison, payments))
+    figure_cache.clear()
+    create_payment_timeline(payments, master)
+    record('chart_timeline_cached', lambda: create_payment_timeline(payments, master))
+    return results
+
+def print_results(all_results):
+    print(f"{'rows':>10}  {'stage':<26} {'ms':>10} {'peak MB':>10}")
+    for rows, stages in all_results.items():
+        for stage, result in stages.items():
+            peak = f"{result['peak_bytes'] / 2 ** 20:10.1f}" if result['peak_bytes'] is not None else f"{'-':>10}"
+            print(f"{rows:>10}  {stage:<26} {result['seconds'] * 1000:10.2f} {peak}")
+
+def compare(all_results, baseline, tolerance, min_seconds=0.002):
+    """Stages slower / hungrier than baseline by more than `tolerance` (noise floor: min_seconds)"""
+    regressions = []
+    for rows, stages in all_results.items():
+        for stage, result in stages.items():
+            base = baseline.get(str(rows), {}).get(stage)
+            if not base:
+                continue
+            if result['seconds'] > max(base['seconds'] * (1 + tolerance), min_seconds):
+                regressions.append(f"{rows} rows {stage}: {base['seconds'] * 1000:.2f} -> {result['seconds'] * 1000:.2f} ms")
+            if result['peak_bytes'] and base.get('peak_bytes') and result['peak_bytes'] > base['peak_bytes'] * (1 + tolerance):
+                regressions.append(f"{rows} rows {stage}: peak {base['peak_bytes'] / 2 ** 20:.1f} -> {result['peak_bytes'] / 2 ** 20:.1f} MB")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--latency', type=float, default=0.0, help='fake Sheets latency per request (s)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help='write results as a JSON baseline')
+    parser.add_argument('--compare', help='baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    np.seterr(all='ignore')
+    all_results = {rows: run_size(rows, args.latency, args.repeat) for rows in args.rows}
+    print_results(all_results)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({str(rows): stages for rows, stages in all_results.items()}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(all_results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
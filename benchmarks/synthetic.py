@@ -0,0 +1,74 @@
+"""
+Deterministic generator of realistic raw sheet values (what values_batch_get returns)
+"""
+import numpy as np
+import pandas as pd
+
+DOCTORS = ['Dr. Tripic', 'Dr. Cartagena', 'Dr. Tugalov', 'Dr. Singh', 'Dr. Moreau']
+TYPES = ['EMG', 'NCS', 'EMG + NCS', 'Follow-up']
+STATUSES = ['Paid', 'Pending', 'Projected']
+EXPENSE_CATEGORIES = ['Rent', 'Supplies', 'Equipment', 'Travel', 'Insurance', 'Software']
+
+def _messy_amounts(rng, cents):
+    """'$1,234.00' mostly, with bare numbers, blanks and '(CAD ...)' refunds mixed in"""
+    amounts = np.array([f"${c // 100:,}.{c % 100:02d}" for c in cents], dtype=object)
+    kind = rng.random(len(cents))
+    bare = kind < 0.05
+    amounts[bare] = [f"{c / 100:.2f}" for c in cents[bare]]
+    refunds = (kind >= 0.05) & (kind < 0.06)
+    amounts[refunds] = [f"(CAD {a})" for a in amounts[refunds]]
+    amounts[(kind >= 0.06) & (kind < 0.07)] = ''
+    return amounts
+
+def _mixed_dates(rng, days):
+    """Sheets' M/D/YYYY mostly, plus pasted ISO dates and a few typed by hand"""
+    dates = days.strftime('%m/%d/%Y').to_numpy(dtype=object)
+    kind = rng.random(len(days))
+    iso = kind < 0.05
+    dates[iso] = days[iso].strftime('%Y-%m-%d')
+    typed = (kind >= 0.05) & (kind < 0.06)
+    dates[typed] = days[typed].strftime('%b %d, %Y')
+    return dates
+
+def _days(rng, rows, start='2018-01-01', span=3000):
+    offsets = np.sort(rng.integers(0, span, rows))  # sheets are appended in date order
+    return pd.Timestamp(start) + pd.to_timedelta(offsets, unit='D')
+
+def generate_sheets(rows, seed=0, expense_rows=None):
+    """{sheet name: [header, *rows]} for Payments, Master_Income and Expenses"""
+    rng = np.random.default_rng(seed)
+    expense_rows = expense_rows if expense_rows is not None else max(rows // 20, 10)
+
+    def income(n, with_status):
+        header = ['Date', 'Doctor / Location', 'Patients Seen / Type', 'Total Earned']
+        columns = [
+            _mixed_dates(rng, _days(rng, n)),
+            rng.choice(DOCTORS, n, p=[0.3, 0.25, 0.25, 0.1, 0.1]),
+            rng.choice(TYPES, n),
+            _messy_amounts(rng, rng.integers(5_000, 400_000, n)),
+        ]
+        if with_status:
+            header.append('Status')
+            columns.append(rng.choice(STATUSES, n, p=[0.85, 0.1, 0.05]))
+        return [header] + [list(row) for row in zip(*columns)]
+
+    expenses = [['Date', 'Category', 'Description', 'Total Earned']] + [
+        list(row) for row in zip(
+            _mixed_dates(rng, _days(rng, expense_rows)),
+            rng.choice(EXPENSE_CATEGORIES, expense_rows),
+            np.full(expense_rows, 'Clinic expense'),
+            _messy_amounts(rng, rng.integers(1_000, 200_000, expense_rows)),
+        )
+    ]
+    return {
+        'Payments': income(rows, with_status=False),
+        'Master_Income': income(rows, with_status=True),
+        'Expenses': expenses,
+    }
+
+def append_rows(sheets, rows, seed=1):
+    """Append `rows` new Payments/Master_Income rows in place (simulates new activity)"""
+    fresh = generate_sheets(rows, seed=seed, expense_rows=0)
+    for name in ('Payments', 'Master_Income'):
+        sheets[name].extend(fresh[name][1:])
+    return sheets
@@ -0,0 +1,158 @@
+"""
+Precomputed aggregate cube shared by every page (built once per data load)
+"""
+import threading
+from itertools import combinations
+import pandas as pd
+from utils.locations import OTHER_LOCATION
+from utils.money import AMOUNT_COLUMN, Money
+from utils.perf import span, timed
+
+DIMENSIONS = ['Location', 'Doctor', 'Month', 'Status']
+
+def _keyed_frame(df, doctor_locations):
+    """Project a normalized frame onto the cube dimensions plus the amount in cents
+
+    Month is kept as a yyyymm integer here and only formatted once per cube
+    cell, since formatting every row's date is the expensive part.
+    """
+    blank = pd.Series('', index=df.index, dtype='category')
+    doctors = df['Doctor'].astype('category') if 'Doctor' in df.columns else blank
+    if 'Date' in df.columns:
+        months = (df['Date'].dt.year * 100 + df['Date'].dt.month).fillna(-1).astype('int64')
+    else:
+        months = pd.Series(-1, index=df.index)
+    return pd.DataFrame({
+        'Location': doctors.map(doctor_locations).astype(object).fillna(OTHER_LOCATION),
+        'Doctor': doctors,
+        'Month': months,
+        'Status': df['Status'].astype('category') if 'Status' in df.columns else blank,
+        'Amount': df[AMOUNT_COLUMN],
+    })
+
+def _month_label(yyyymm):
+    return f"{yyyymm // 100:04d}-{yyyymm % 100:02d}" if yyyymm >= 0 else ''
+
+def _rollups(base):
+    """{(location, doctor, month, status): (Money, count)} for every roll-up of a base groupby
+
+    None in a key position means "any"; the all-None key is the grand total.
+    """
+    base = base.assign(Month=base['Month'].map(_month_label))
+    cells = {(None, None, None, None): (Money(int(base['sum'].sum())), int(base['count'].sum()))}
+    for size in range(1, len(DIMENSIONS) + 1):
+        for dims in combinations(DIMENSIONS, size):
+            rollup = base.groupby(list(dims), sort=False)[['sum', 'count']].sum()
+            for key, total, count in zip(rollup.index, rollup['sum'], rollup['count']):
+                values = dict(zip(dims, key if isinstance(key, tuple) else (key,)))
+                cells[tuple(values.get(dim) for dim in DIMENSIONS)] = (Money(int(total)), int(count))
+    return cells
+
+class AggregateCube:
+    """Sum/count of amounts for every Location x Doctor x Month x Status combination
+
+    All 16 roll-ups (each dimension either fixed or "any") are materialized as
+    plain dicts, so every lookup a page makes is a single dict access. Sums are
+    exact integer cents and come back as Money; counts skip missing amounts.
+
+    `add` only folds rows into the base Location x Doctor x Month x Status
+    groupby; the roll-ups are derived from it by `rollup()`, which lookups and
+    `copy()` run on demand, so a streamed load pays for them once per publish
+    rather than once per chunk.
+    """
+
+    def __init__(self, frames, doctor_locations, breakdowns=None):
+        self.doctor_locations = doctor_locations
+        self.breakdown_columns = list(breakdowns or [])
+        self._cells = {}
+        self._bases = {}
+        self._pending = {}
+        self._breakdowns = {}
+        self._lock = threading.Lock()
+        for source, df in frames.items():
+            self.add(source, df)
+        self.rollup()
+
+    def add(self, source, df):
+        """Fold rows of `source` into the base groupby (e.g. each chunk of a streamed sheet)"""
+        if df.empty or AMOUNT_COLUMN not in df.columns:
+            return
+        keyed = _keyed_frame(df, self.doctor_locations)
+        base = keyed.groupby(DIMENSIONS, sort=False, observed=True, dropna=False)['Amount'].agg(['sum', 'count']).reset_index()
+        # Chunks carry their own categories, so compare keys as plain strings
+        for dim in ('Location', 'Doctor', 'Status'):
+            base[dim] = base[dim].astype(str)
+
+        # Per-source single-column totals, e.g. Expenses by Category
+        breakdowns = {}
+        for breakdown_source, column in self.breakdown_columns:
+            if breakdown_source == source and column in df.columns:
+                totals = df.groupby(column, observed=True)[AMOUNT_COLUMN].sum()
+                previous = self._breakdowns.get((source, column))
+                if previous is not None:
+                    totals = previous.add(totals, fill_value=0)
+                breakdowns[(source, column)] = totals.sort_values(ascending=False)
+
+        with self._lock:
+            self._pending.setdefault(source, []).append(base)
+            self._breakdowns.update(breakdowns)
+
+    def rollup(self):
+        """Fold pending rows into the base groupby and re-derive the roll-ups of the sources they touch"""
+        with self._lock:
+            if not self._pending:
+                return
+            with span('cube.rollup', rows=sum(len(b) for bases in self._pending.values() for b in bases)):
+                self._rollup_pending()
+
+    def _rollup_pending(self):
+        for source, bases in self._pending.items():
+            if source in self._bases:
+                bases = [self._bases[source], *bases]
+            base = bases[0] if len(bases) == 1 else (
+                pd.concat(bases, ignore_index=True)
+                .groupby(DIMENSIONS, sort=False)[['sum', 'count']].sum().reset_index())
+            self._bases[source] = base
+            self._cells[source] = _rollups(base)
+        self._pending = {}
+
+    def copy(self):
+        """Independent cube with the same roll-ups (a snapshot of one still being fed)"""
+        self.rollup()
+        other = AggregateCube({}, self.doctor_locations, self.breakdown_columns)
+        with self._lock:
+            other._cells = dict(self._cells)
+            other._bases = dict(self._bases)
+            other._breakdowns = dict(self._breakdowns)
+        return other
+
+    def _cell(self, source, location=None, doctor=None, month=None, status=None):
+        if self._pending:
+            self.rollup()
+        return self._cells.get(source, {}).get((location, doctor, month, status), (Money(0), 0))
+
+    def total(self, source, **filters):
+        return self._cell(source, **filters)[0]
+
+    def count(self, source, **filters):
+        return self._cell(source, **filters)[1]
+
+    def mean(self, source, **filters):
+        total, count = self._cell(source, **filters)
+        return Money(round(total / count)) if count else Money(0)
+
+    def breakdown(self, source, column):
+        """Per-value totals of one column in cents (Int64 Series, largest first)"""
+        return self._breakdowns.get((source, column), pd.Series(dtype='Int64'))
+
+# Single-column totals the dashboard cube keeps besides the roll-ups
+CUBE_BREAKDOWNS = [('expenses', 'Category')]
+
+@timed('cube.build')
+def build_cube(payments, master, expenses, doctor_locations):
+    """Build the shared cube for the three dashboard sheets"""
+    return AggregateCube(
+        {'payments': payments, 'master': master, 'expenses': expenses},
+        doctor_locations,
+        breakdowns=CUBE_BREAKDOWNS,
+    )
@@ -0,0 +1,234 @@
+"""
+Receivables aging index: pending items kept date-sorted with bucketed totals
+"""
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from utils.locations import OTHER_LOCATION
+from utils.money import AMOUNT_COLUMN
+
+# (label, max days pending); the last bucket is open-ended
+AGING_BUCKETS = [('0–30', 30), ('31–60', 60), ('61–90', 90), ('90+', None)]
+
+# Beyond this many new pending rows a sorted rebuild beats one-by-one inserts
+MAX_INCREMENTAL_INSERTS = 500
+
+def _pending_flags(work_df):
+    return (work_df['Status'].astype(object) == 'Pending').to_numpy(dtype=bool)
+
+class AgingIndex:
+    """Pending items sorted by date, with per-bucket totals by doctor and by location
+
+    Bucket membership is three searchsorted cut points on the sorted dates,
+    recomputed only when the day rolls over. Bucket totals are cached and
+    adjusted cell by cell when an item's status changes or an item is added.
+    Anything else (edited amounts, dates or doctors, deleted rows) needs a
+    rebuild, which `sync` does whenever the data generation changes.
+    Amounts are int64 cents (a missing amount counts as 0 but the item still ages).
+    """
+
+    def __init__(self, doctor_locations=None, today=None):
+        self.doctor_locations = dict(doctor_locations or {})
+        self._fixed_today = today
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.dates = np.array([], dtype='datetime64[D]')
+        self.amounts = np.array([], dtype=np.int64)
+        self.doctors = np.array([], dtype=object)
+        self.locations = np.array([], dtype=object)
+        self.row_ids = np.array([], dtype=np.int64)
+        self.active = np.array([], dtype=bool)
+        self._positions = {}  # row id -> position in the sorted arrays
+        self._known_rows = 0
+        self._pending_flags = np.array([], dtype=bool)  # Status == 'Pending' for every known row
+        self._generation = None
+        self._today = None
+        self._cuts = None
+        self._tables = None
+
+    # --- building -------------------------------------------------------
+
+    def _today_date(self):
+        today = self._fixed_today if self._fixed_today is not None else datetime.now()
+        return np.datetime64(pd.Timestamp(today).date(), 'D')
+
+    def _rebuild(self, work_df):
+        self._reset()
+        pending = work_df[(work_df['Status'] == 'Pending') & work_df['Date'].notna()]
+        order = np.argsort(pending['Date'].to_numpy(dtype='datetime64[D]'), kind='stable')
+        self.dates = pending['Date'].to_numpy(dtype='datetime64[D]')[order]
+        self.amounts = pending[AMOUNT_COLUMN].to_numpy(dtype='int64', na_value=0)[order]
+        doctors = pending['Doctor'].astype(str).to_numpy(dtype=object) if 'Doctor' in pending.columns else np.full(len(pending), '', dtype=object)
+        self.doctors = doctors[order]
+        self.locations = np.array([self.doctor_locations.get(d, OTHER_LOCATION) for d in self.doctors], dtype=object)
+        self.row_ids = pending.index.to_numpy(dtype=np.int64)[order]
+        self.active = np.ones(len(order), dtype=bool)
+        self._positions = {row_id: i for i, row_id in enumerate(self.row_ids)}
+        self._known_rows = len(work_df)
+        self._pending_flags = _pending_flags(work_df)
+
+    def _insert(self, row_id, date, amount, doctor):
+        pos = int(np.searchsorted(self.dates, date, side='right'))
+        self.dates = np.insert(self.dates, pos, date)
+        self.amounts = np.insert(self.amounts, pos, amount)
+        self.doctors = np.insert(self.doctors, pos, doctor)
+        self.locations = np.insert(self.locations, pos, self.doctor_locations.get(doctor, OTHER_LOCATION))
+        self.row_ids = np.insert(self.row_ids, pos, row_id)
+        self.active = np.insert(self.active, pos, True)
+        self._positions = {rid: i for i, rid in enumerate(self.row_ids)}
+        if self._cuts is not None:
+            # Each cut counts the dates before it, so it moves only if the new date is older
+            self._cuts = tuple(cut + int(date < cut_date) for cut, cut_date in zip(self._cuts, self._cut_dates))
+            self._adjust(pos, +1)
+
+    def sync(self, work_df, generation=None):
+        """Bring the index up to date with the work frame
+
+        `generation` identifies the data load (the bundle's generation):
+        while it is unchanged the frame is assumed to only have grown, so
+        status changes and appended rows are applied in place; a new
+        generation means rows may have been edited or deleted and the index
+        is rebuilt.
+        """
+        with self._lock:
+            if work_df.empty or not {'Status', 'Date', AMOUNT_COLUMN} <= set(work_df.columns):
+                self._reset()
+                return self
+            if (len(work_df) < self._known_rows or self._known_rows == 0
+                    or (generation is not None and generation != self._generation)):
+                self._rebuild(work_df)
+                self._generation = generation
+                return self
+
+            # Status changes on every known row, including ones that only now became Pending
+            flags = _pending_flags(work_df)
+            changed = np.flatnonzero(flags[:self._known_rows] != self._pending_flags)
+            appended = work_df.iloc[self._known_rows:]
+            new_pending = appended[flags[self._known_rows:] & appended['Date'].notna().to_numpy()]
+            if len(changed) + len(new_pending) > MAX_INCREMENTAL_INSERTS:
+                self._rebuild(work_df)
+                self._generation = generation
+                return self
+            for position in changed:
+                row_id = int(work_df.index[position])
+                pos = self._positions.get(row_id)
+                if pos is not None:
+                    self._set_active(pos, bool(flags[position]))
+                elif flags[position]:
+                    self._insert_row(row_id, work_df.iloc[position])
+
+            # Rows appended since the last sync
+            for row_id, row in new_pending.iterrows():
+                self._insert_row(int(row_id), row)
+            self._known_rows = len(work_df)
+            self._pending_flags = flags
+            return self
+
+    def _insert_row(self, row_id, row):
+        if pd.isna(row['Date']):
+            return
+        amount = row[AMOUNT_COLUMN]
+        self._insert(row_id, np.datetime64(row['Date'].date(), 'D'), 0 if pd.isna(amount) else int(amount),
+                     str(row['Doctor']) if 'Doctor' in row.index else '')
+
+    def update_status(self, row_id, status):
+        """Apply a single status change in place"""
+        with self._lock:
+            pos = self._positions.get(row_id)
+            if pos is not None:
+                self._set_active(pos, status == 'Pending')
+
+    def _set_active(self, pos, active):
+        if self.active[pos] == active:
+            return
+        self.active[pos] = active
+        self._adjust(pos, +1 if active else -1)
+
+    # --- buckets --------------------------------------------------------
+
+    def _refresh_cuts(self):
+        today = self._today_date()
+        if today == self._today and self._cuts is not None:
+            return
+        self._today = today
+        self._cut_dates = [today - np.timedelta64(days, 'D') for _, days in AGING_BUCKETS if days is not None]
+        # Dates >= today-30 are 0–30 days old, etc.; dates are ascending so older buckets come first
+        self._cuts = tuple(int(np.searchsorted(self.dates, cut, side='left')) for cut in self._cut_dates)
+        self._tables = None
+
+    def _bucket_slices(self):
+        """Position ranges per bucket in AGING_BUCKETS order"""
+        c30, c60, c90 = self._cuts
+        return [(c30, len(self.dates)), (c60, c30), (c90, c60), (0, c90)]
+
+    def _bucket_of(self, pos):
+        for bucket, (start, end) in enumerate(self._bucket_slices()):
+            if start <= pos < end:
+                return bucket
+        return len(AGING_BUCKETS) - 1
+
+    def _build_tables(self):
+        """{'doctor': {name: [sum per bucket]}, 'location': {...}, plus matching '_count' tables}"""
+        tables = {'doctor': {}, 'location': {}, 'doctor_count': {}, 'location_count': {}}
+        for bucket, (start, end) in enumerate(self._bucket_slices()):
+            active = self.active[start:end]
+            amounts = self.amounts[start:end][active]
+            for key, groups in (('doctor', self.doctors[start:end][active]), ('location', self.locations[start:end][active])):
+                if not len(groups):
+                    continue
+                names, inverse = np.unique(groups.astype(str), return_inverse=True)
+                sums = np.zeros(len(names), dtype=np.int64)
+                np.add.at(sums, inverse, amounts)
+                counts = np.bincount(inverse, minlength=len(names))
+                for name, total, count in zip(names, sums, counts):
+                    tables[key].setdefault(name, [0] * len(AGING_BUCKETS))[bucket] += int(total)
+                    tables[key + '_count'].setdefault(name, [0] * len(AGING_BUCKETS))[bucket] += int(count)
+        self._tables = tables
+
+    def _adjust(self, pos, sign):
+        """Add/remove one item's amount from the cached bucket tables"""
+        if self._tables is None:
+            return
+        bucket = self._bucket_of(pos)
+        for key, name in (('doctor', str(self.doctors[pos])), ('location', self.locations[pos])):
+            self._tables[key].setdefault(name, [0] * len(AGING_BUCKETS))[bucket] += sign * int(self.amounts[pos])
+            self._tables[key + '_count'].setdefault(name, [0] * len(AGING_BUCKETS))[bucket] += sign
+
+    def summary(self, by='location', counts=False):
+        """DataFrame of bucket totals in cents (or item counts) indexed by doctor or location"""
+        with self._lock:
+            self._refresh_cuts()
+            if self._tables is None:
+                self._build_tables()
+            table = self._tables[by + ('_count' if counts else '')]
+            labels = [label for label, _ in AGING_BUCKETS]
+            df = pd.DataFrame.from_dict(table, orient='index', columns=labels)
+            df = df[(df != 0).any(axis=1)] if not df.empty else pd.DataFrame(columns=labels)
+            df.index.name = by.title()
+            return df.sort_index()
+
+    def bucket_totals(self):
+        totals = self.summary('location')
+        labels = [label for label, _ in AGING_BUCKETS]
+        return totals.sum() if not totals.empty else pd.Series(0, index=labels, dtype='int64')
+
+    def overdue(self, days_threshold=30, doctor=None, location=None):
+        """Active items pending more than `days_threshold` days, oldest first"""
+        with self._lock:
+            today = self._today_date()
+            end = int(np.searchsorted(self.dates, today - np.timedelta64(days_threshold, 'D'), side='left'))
+            mask = self.active[:end].copy()
+            if doctor is not None:
+                mask &= self.doctors[:end] == doctor
+            if location is not None:
+                mask &= self.locations[:end] == location
+            return pd.DataFrame({
+                'Row': self.row_ids[:end][mask],
+                'Date': self.dates[:end][mask].astype('datetime64[ns]'),
+                'Doctor': self.doctors[:end][mask],
+                AMOUNT_COLUMN: self.amounts[:end][mask],
+                'days_pending': (today - self.dates[:end][mask]).astype(np.int64),
+            })
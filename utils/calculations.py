@@ -2,15 +2,20 @@
 Financial calculations and metrics
 """
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
+from utils.aging import AgingIndex
+from utils.forecasting import ForecastEngine
+from utils.money import AMOUNT_COLUMN, Money, total
+from utils.perf import timed
 
+@timed('metrics.calculate')
 def calculate_metrics(payments_df, work_df, income_df):
-    """Calculate key financial metrics"""
+    """Calculate key financial metrics (amounts as exact Money)"""
     
     metrics = {}
     
     # Total received
-    metrics['total_received'] = payments_df['Amount'].sum() if not payments_df.empty else 0
+    metrics['total_received'] = total(payments_df[AMOUNT_COLUMN]) if not payments_df.empty else Money(0)
     
     # This month received
     current_month = datetime.now().month
@@ -19,50 +24,51 @@ def calculate_metrics(payments_df, work_df, income_df):
         (payments_df['Date'].dt.month == current_month) &
         (payments_df['Date'].dt.year == current_year)
     ]
-    metrics['month_received'] = this_month['Amount'].sum() if not this_month.empty else 0
+    metrics['month_received'] = total(this_month[AMOUNT_COLUMN]) if not this_month.empty else Money(0)
     
     # Pending payments
     pending = work_df[work_df['Status'] == 'Pending']
-    metrics['pending'] = pending['Amount'].sum() if not pending.empty else 0
+    metrics['pending'] = total(pending[AMOUNT_COLUMN]) if not pending.empty else Money(0)
     
     # Projected income
     projected = work_df[work_df['Status'] == 'Projected']
-    metrics['projected'] = projected['Amount'].sum() if not projected.empty else 0
+    metrics['projected'] = total(projected[AMOUNT_COLUMN]) if not projected.empty else Money(0)
     
     # Average payment
-    metrics['avg_payment'] = payments_df['Amount'].mean() if not payments_df.empty else 0
+    paid = payments_df[AMOUNT_COLUMN].count() if not payments_df.empty else 0
+    metrics['avg_payment'] = Money(round(int(payments_df[AMOUNT_COLUMN].sum()) / paid)) if paid else Money(0)
     
     # Payment count
     metrics['payment_count'] = len(payments_df)
     
     return metrics
 
-def forecast_next_month(payments_df):
-    """Forecast next month's income based on historical average"""
+@timed('metrics.forecast_next_month')
+def forecast_next_month(payments_df, engine=None):
+    """Forecast next month's income from the last 3 complete months
+
+    Pass a long-lived ForecastEngine to avoid rebuilding the monthly series.
+    """
     if payments_df.empty:
-        return 0
-    
-    # Get last 3 months average
-    three_months_ago = datetime.now() - timedelta(days=90)
-    recent = payments_df[payments_df['Date'] >= three_months_ago]
-    
-    if recent.empty:
-        return 0
+        return Money(0)
     
-    avg_daily = recent['Amount'].sum() / 90
-    return avg_daily * 30
+    engine = (engine or ForecastEngine()).update(payments_df)
+    forecast = engine.forecast(horizon=1, method='moving_average')
+    return Money.from_dollars(forecast['Forecast'].sum()) if not forecast.empty else Money(0)
 
-def identify_pending_payments(work_df, days_threshold=30):
-    """Identify payments pending over threshold days"""
+@timed('metrics.pending_payments')
+def identify_pending_payments(work_df, days_threshold=30, aging_index=None):
+    """Identify payments pending over threshold days (oldest first)
+
+    Pass a long-lived AgingIndex to reuse its sorted pending items.
+    """
     if work_df.empty:
         return pd.DataFrame()
     
-    pending = work_df[work_df['Status'] == 'Pending'].copy()
+    aging_index = (aging_index or AgingIndex()).sync(work_df)
+    overdue = aging_index.overdue(days_threshold)
     
-    if pending.empty:
+    if overdue.empty:
         return pd.DataFrame()
     
-    pending['days_pending'] = (datetime.now() - pending['Date']).dt.days
-    overdue = pending[pending['days_pending'] > days_threshold]
-    
-    return overdue.sort_values('days_pending', ascending=False)
+    return work_df.loc[overdue['Row']].assign(days_pending=overdue['days_pending'].to_numpy())
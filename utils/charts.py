@@ -1,44 +1,116 @@
 """
 Chart creation utilities using Plotly
 """
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 from datetime import datetime, timedelta
+from utils.figure_cache import cached_figure
+from utils.money import AMOUNT_COLUMN, to_dollars
+from utils.perf import timed
 
-def create_payment_timeline(payments_df, work_df):
-    """Create timeline chart showing past, present, and future"""
+# Above this many plotted points a trace is drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = 1000
+# Roughly the horizontal pixel resolution of the chart; more points can't be seen
+MAX_TIMELINE_POINTS = 2000
+# Downsampling buckets, finest first (see downsample_minmax)
+DOWNSAMPLE_PERIODS = ['D', 'W', 'M']
+
+def _period_buckets(dates, period):
+    """Calendar bucket number of each date: 'D' days, 'W' Monday-start weeks, 'M' months"""
+    if period == 'M':
+        return dates.astype('datetime64[M]').astype('int64')
+    days = dates.astype('datetime64[D]').astype('int64')
+    return (days + 3) // 7 if period == 'W' else days  # 1970-01-01 was a Thursday
+
+def downsample_minmax(dates, y, max_points):
+    """Indices keeping the min and max of each calendar day, week or month of sorted `dates`
+
+    The finest period whose min/max pairs fit in `max_points` is used, so a
+    bucket always spans the same stretch of time whatever the data volume and
+    every day's (or week's) extremes survive. Fully vectorized: buckets are
+    contiguous runs, reduced with ufunc.reduceat.
+    """
+    n = len(y)
+    if n <= max_points or max_points < 2:
+        return np.arange(n)
+
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    for period in DOWNSAMPLE_PERIODS:
+        buckets = _period_buckets(dates, period)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        if 2 * len(starts) <= max_points:
+            break
+    y = np.asarray(y, dtype='float64')
+    bucket_of = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    keep = [[0, n - 1]]
+    for reduce in (np.minimum, np.maximum):
+        # First row of each bucket that equals the bucket's extreme
+        hits = np.flatnonzero(y == reduce.reduceat(y, starts)[bucket_of])
+        keep.append(hits[np.r_[True, bucket_of[hits][1:] != bucket_of[hits][:-1]]])
+    return np.unique(np.concatenate(keep))
+
+def _timeline_points(df, max_points):
+    """Date-sorted (x, y) for a timeline trace, downsampled when too dense to see"""
+    df = df[['Date', AMOUNT_COLUMN]].dropna().sort_values('Date', kind='stable')
+    x, y = df['Date'].to_numpy(), to_dollars(df[AMOUNT_COLUMN]).to_numpy()
+    if max_points and len(x) > max_points:
+        keep = downsample_minmax(x, y, max_points)
+        x, y = x[keep], y[keep]
+    return x, y
+
+def _scatter_class(n_points):
+    return go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
+
+def create_payment_timeline(payments_df, work_df, max_points=MAX_TIMELINE_POINTS, data_version=None):
+    """Create timeline chart showing past, present, and future
+
+    Series longer than `max_points` are min/max-downsampled and large traces
+    switch to WebGL, so the figure size stays bounded as history grows.
+    Pass max_points=None to plot every row.
+    """
+    # Today's date is part of the cache key, so the Today line moves at midnight even if the data doesn't
+    return _payment_timeline(payments_df, work_df, max_points=max_points, today=datetime.now().date(),
+                             data_version=data_version)
+
+@cached_figure(['Date', AMOUNT_COLUMN, 'Status'])
+@timed('chart.timeline')
+def _payment_timeline(payments_df, work_df, max_points, today):
     fig = go.Figure()
     
     # Add payments (past)
     if not payments_df.empty:
-        fig.add_trace(go.Scatter(
-            x=payments_df['Date'],
-            y=payments_df['Amount'],
+        x, y = _timeline_points(payments_df, max_points)
+        fig.add_trace(_scatter_class(len(x))(
+            x=x,
+            y=y,
             mode='markers+lines',
             name='Received',
-            marker=dict(size=10, color='green'),
+            marker=dict(size=10 if len(x) <= WEBGL_THRESHOLD else 4, color='green'),
             line=dict(color='green', width=2)
         ))
     
     # Add pending (present)
-    pending = work_df[work_df['Status'] == 'Pending']
+    pending = work_df[work_df['Status'] == 'Pending'] if 'Status' in work_df.columns else work_df.iloc[0:0]
     if not pending.empty:
-        fig.add_trace(go.Scatter(
-            x=pending['Date'],
-            y=pending['Amount'],
+        x, y = _timeline_points(pending, max_points)
+        fig.add_trace(_scatter_class(len(x))(
+            x=x,
+            y=y,
             mode='markers',
             name='Pending',
             marker=dict(size=12, color='orange', symbol='diamond')
         ))
     
     # Add projected (future)
-    projected = work_df[work_df['Status'] == 'Projected']
+    projected = work_df[work_df['Status'] == 'Projected'] if 'Status' in work_df.columns else work_df.iloc[0:0]
     if not projected.empty:
-        fig.add_trace(go.Scatter(
-            x=projected['Date'],
-            y=projected['Amount'],
+        x, y = _timeline_points(projected, max_points)
+        fig.add_trace(_scatter_class(len(x))(
+            x=x,
+            y=y,
             mode='markers',
             name='Projected',
             marker=dict(size=10, color='blue', symbol='square')
@@ -47,7 +119,7 @@ def create_payment_timeline(payments_df, work_df):
     # Add today line
     try:  # Try to add vline, skip if data is malformed
         fig.add_vline(
-            x=datetime.now(),
+            x=pd.Timestamp(today),
             line_dash="dash",
             line_color="red",
             annotation_text="Today"
@@ -65,12 +137,14 @@ def create_payment_timeline(payments_df, work_df):
     
     return fig
 
+@cached_figure(['Doctor', AMOUNT_COLUMN])
+@timed('chart.income_breakdown')
 def create_income_breakdown(payments_df):
     """Create pie chart of income by doctor"""
     if payments_df.empty or 'Doctor' not in payments_df.columns:
         return go.Figure()
     
-    doctor_totals = payments_df.groupby('Doctor')['Amount'].sum().reset_index()
+    doctor_totals = to_dollars(payments_df.groupby('Doctor', observed=True)[AMOUNT_COLUMN].sum()).rename('Amount').reset_index()
     
     fig = px.pie(
         doctor_totals,
@@ -83,13 +157,16 @@ def create_income_breakdown(payments_df):
     fig.update_traces(textposition='inside', textinfo='percent+label')
     return fig
 
+@cached_figure(['Date', AMOUNT_COLUMN])
+@timed('chart.monthly_trend')
 def create_monthly_trend(payments_df):
     """Create line chart of monthly income trend"""
     if payments_df.empty:
         return go.Figure()
     
-    payments_df['YearMonth'] = payments_df['Date'].dt.to_period('M').astype(str)
-    monthly = payments_df.groupby('YearMonth')['Amount'].sum().reset_index()
+    # Don't add columns to the caller's (cached, shared) frame
+    year_month = payments_df['Date'].dt.to_period('M').astype(str).rename('YearMonth')
+    monthly = to_dollars(payments_df[AMOUNT_COLUMN].groupby(year_month).sum()).rename('Amount').reset_index()
     
     fig = px.line(
         monthly,
@@ -107,16 +184,19 @@ def create_monthly_trend(payments_df):
     
     return fig
 
+@cached_figure(['Doctor', AMOUNT_COLUMN])
+@timed('chart.doctor_comparison')
 def create_doctor_comparison(payments_df):
     """Create bar chart comparing doctors"""
     if payments_df.empty or 'Doctor' not in payments_df.columns:
         return go.Figure()
     
-    doctor_stats = payments_df.groupby('Doctor').agg({
-        'Amount': ['sum', 'mean', 'count']
-    }).round(2)
+    doctor_stats = payments_df.groupby('Doctor', observed=True).agg({
+        AMOUNT_COLUMN: ['sum', 'mean', 'count']
+    })
     
     doctor_stats.columns = ['Total', 'Average', 'Count']
+    doctor_stats[['Total', 'Average']] = to_dollars(doctor_stats[['Total', 'Average']]).round(2)
     doctor_stats = doctor_stats.reset_index()
     
     fig = make_subplots(
@@ -136,3 +216,41 @@ def create_doctor_comparison(payments_df):
     
     fig.update_layout(height=400, showlegend=False)
     return fig
+
+@cached_figure(['Doctor', 'Month', 'Forecast', 'Lower', 'Upper'])
+@timed('chart.forecast')
+def create_forecast_chart(forecast_df):
+    """Create per-doctor forecast lines with 95% confidence bands"""
+    if forecast_df.empty:
+        return go.Figure()
+    
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, (doctor, rows) in enumerate(forecast_df.groupby('Doctor', sort=False)):
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Scatter(
+            x=list(rows['Month']) + list(rows['Month'])[::-1],
+            y=list(rows['Upper']) + list(rows['Lower'])[::-1],
+            fill='toself',
+            fillcolor=color,
+            opacity=0.15,
+            line=dict(width=0),
+            hoverinfo='skip',
+            showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=rows['Month'],
+            y=rows['Forecast'],
+            mode='markers+lines',
+            name=doctor,
+            line=dict(color=color, width=2)
+        ))
+    
+    fig.update_layout(
+        title="Projected Monthly Income by Doctor",
+        xaxis_title="Month",
+        yaxis_title="Amount ($)",
+        height=450
+    )
+    
+    return fig
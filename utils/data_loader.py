@@ -1,58 +1,615 @@
 """
 Data loader module for Google Sheets integration
 """
-import gspread
-from google.oauth2.service_account import Credentials
+import hashlib
+import logging
+import sys
+import threading
+import time
+import uuid
+import numpy as np
 import pandas as pd
 import streamlit as st
+from utils.normalize import append_frames, normalize_frame
+from utils.perf import span, timed
+from utils.snapshot import load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+
+# Streaming loads: rows requested per worksheet per round trip, and the raw-value
+# budget for one round (list-of-strings rows cost far more than the parsed columns)
+CHUNK_ROWS = 20_000
+MAX_CHUNK_BYTES = 64 * 2 ** 20
+
+# Raw columns a delta sync re-reads in full to spot edits to existing rows
+# (e.g. a payment going from Pending to Paid); see _watch_digest
+WATCH_COLUMNS = ['Status', 'Total Earned']
+
+@st.cache_resource
+def get_spreadsheet():
+    """Return a process-wide spreadsheet handle (auth + metadata fetched once)"""
+    # Imported here so sessions served from snapshots never pay for gspread/google-auth
+    import gspread
+    from google.oauth2.service_account import Credentials
+    credentials = Credentials.from_service_account_info(
+        st.secrets["gcp_service_account"], scopes=SCOPES
+    )
+    client = gspread.authorize(credentials)
+    return client.open_by_key(st.secrets["sheets"]["spreadsheet_id"])
+
+def _column_letter(col):
+    """1-based column number -> A1 column letters (1 -> A, 27 -> AA)"""
+    letters = ''
+    while col > 0:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def _sheet_range(sheet_name):
+    """A1 range covering a whole worksheet"""
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+def _batch_get(spreadsheet, ranges):
+    """values_batch_get, timed as Sheets I/O"""
+    with span('sheets.fetch') as info:
+        response = spreadsheet.values_batch_get(ranges)
+        info['rows'] = sum(len(value_range.get('values', [])) for value_range in response.get('valueRanges', []))
+    return response
+
+@timed('sheets.normalize')
+def values_to_dataframe(data, errors=None, first_row=2, date_formats=None):
+    """Build a normalized DataFrame from raw sheet values (header row first)
+
+    If `errors` is a list, [sheet row, raw text] of every amount that could not
+    be parsed is appended to it; `first_row` is the sheet row of data[1].
+    `date_formats` is the sheet's date format list (see normalize_dates).
+    """
+    if not data:
+        return pd.DataFrame()
+
+    # Create DataFrame
+    headers = data[0]
+    width = len(headers)
+    # batchGet trims trailing empty cells, so pad/trim every row to the header width
+    rows = [(row + [''] * width)[:width] for row in data[1:]]
+    df = pd.DataFrame(rows, columns=headers)
+    failures = [] if errors is not None else None
+    df = normalize_frame(df, failures, date_formats)
+    if failures:
+        errors.extend([first_row + position, raw] for position, raw in failures)
+    return df
+
+def load_all_sheets(sheet_names, spreadsheet=None, errors=None):
+    """Fetch several worksheets in one batchGet request -> {name: DataFrame}
+
+    `spreadsheet` defaults to the pooled handle; any object exposing
+    gspread's `values_batch_get` (e.g. a local fake) can be passed instead.
+    If `errors` is a dict it is filled with {name: [[sheet row, raw amount], ...]}.
+    """
+    if spreadsheet is None:
+        spreadsheet = get_spreadsheet()
+
+    response = _batch_get(spreadsheet, [_sheet_range(name) for name in sheet_names])
+    value_ranges = response.get('valueRanges', [])
+
+    # batchGet returns ranges in request order
+    frames = {}
+    for name, value_range in zip(sheet_names, value_ranges):
+        sheet_errors = errors.setdefault(name, []) if errors is not None else None
+        frames[name] = values_to_dataframe(value_range.get('values', []), sheet_errors)
+    for name in sheet_names[len(value_ranges):]:
+        frames[name] = pd.DataFrame()
+    return frames
+
+class FrameBuffer:
+    """Preallocated columns that normalized chunks are copied into
+
+    Sized from the worksheet's grid row count up front and doubled if more
+    rows arrive, so a streamed sheet is never concatenated chunk by chunk.
+    Category columns keep one growing category list and store codes only.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(int(capacity), 1)
+        self.length = 0
+        self._columns = None
+        self._names = []
+
+    def _allocate(self, column):
+        dtype = column.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            return {'kind': 'category', 'codes': np.full(self.capacity, -1, dtype=np.int32),
+                    'categories': [], 'lookup': {}}
+        if isinstance(dtype, pd.Int64Dtype):
+            return {'kind': 'masked', 'values': np.zeros(self.capacity, dtype=np.int64),
+                    'mask': np.ones(self.capacity, dtype=bool)}
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biufmM':
+            return {'kind': 'numpy', 'values': np.empty(self.capacity, dtype=dtype)}
+        return {'kind': 'object', 'values': np.empty(self.capacity, dtype=object), 'dtype': dtype}
+
+    def _grow(self, needed):
+        capacity = max(needed, self.capacity * 2)
+        for storage in self._columns.values():
+            for key in ('codes', 'values', 'mask'):
+                if key in storage:
+                    grown = np.empty(capacity, dtype=storage[key].dtype)
+                    grown[:self.length] = storage[key][:self.length]
+                    storage[key] = grown
+        self.capacity = capacity
+
+    def append(self, chunk):
+        """Copy a normalized chunk in (an empty one still fixes the columns and dtypes)"""
+        if self._columns is None:
+            self._names = list(chunk.columns)
+            self._columns = {name: self._allocate(chunk[name]) for name in self._names}
+        if chunk.empty:
+            return
+        start, end = self.length, self.length + len(chunk)
+        if end > self.capacity:
+            self._grow(end)
+        for name, storage in self._columns.items():
+            column = chunk[name]
+            if storage['kind'] == 'category':
+                # Map this chunk's codes onto the buffer's category list
+                remap = np.empty(len(column.cat.categories) + 1, dtype=np.int32)
+                remap[-1] = -1
+                for i, category in enumerate(column.cat.categories):
+                    if category not in storage['lookup']:
+                        storage['lookup'][category] = len(storage['categories'])
+                        storage['categories'].append(category)
+                    remap[i] = storage['lookup'][category]
+                storage['codes'][start:end] = remap[column.cat.codes.to_numpy()]
+            elif storage['kind'] == 'masked':
+                storage['values'][start:end] = column.to_numpy(dtype='int64', na_value=0)
+                storage['mask'][start:end] = column.isna().to_numpy()
+            else:
+                storage['values'][start:end] = column.to_numpy()
+        self.length = end
+
+    def frame(self, final=False):
+        """The rows so far as a DataFrame
+
+        Mid-load this views the buffers (later chunks only write past the
+        current length). With `final`, columns are copied if the grid row
+        count overestimated the data by a lot, so the unused tail is freed.
+        """
+        if self._columns is None:
+            return pd.DataFrame()
+        n = self.length
+        copy = final and n < self.capacity * 3 // 4
+        trim = (lambda values: values[:n].copy()) if copy else (lambda values: values[:n])
+        data = {}
+        for name, storage in self._columns.items():
+            if storage['kind'] == 'category':
+                codes, categories = trim(storage['codes']), storage['categories']
+                order = sorted(range(len(categories)), key=categories.__getitem__)
+                if order != list(range(len(categories))):
+                    # Sorted categories, as astype('category') gives a sheet loaded in one piece
+                    rank = np.empty(len(order) + 1, dtype=np.int32)
+                    rank[order] = np.arange(len(order), dtype=np.int32)
+                    rank[-1] = -1
+                    codes, categories = rank[codes], [categories[i] for i in order]
+                data[name] = pd.Categorical.from_codes(codes, categories=categories)
+            elif storage['kind'] == 'masked':
+                data[name] = pd.arrays.IntegerArray(trim(storage['values']), trim(storage['mask']))
+            elif storage['kind'] == 'numpy':
+                data[name] = trim(storage['values'])
+            else:
+                data[name] = pd.array(storage['values'][:n], dtype=storage['dtype'])
+        return pd.DataFrame(data, columns=self._names)
+
+def _raw_row_bytes(rows, sample=200):
+    """Rough in-memory size of one raw row (list of str cells), from a sample"""
+    picked = rows[::max(len(rows) // sample, 1)][:sample]
+    if not picked:
+        return 0
+    return sum(sys.getsizeof(row) + sum(sys.getsizeof(cell) for cell in row) for row in picked) / len(picked)
+
+def _watch_indexes(header):
+    """Positions of the WATCH_COLUMNS in a raw header row"""
+    return [i for i, column in enumerate(header) if column in WATCH_COLUMNS]
+
+def _watch_digest(rows, indexes, digests=None):
+    """Fold the watched cells of raw data rows into running per-column digests (created if None)
+
+    Rows may be fed in several calls (e.g. chunk by chunk) and give the same
+    digests as one call; missing cells count as empty, as the API trims them.
+    """
+    if digests is None:
+        digests = [hashlib.blake2b(digest_size=16) for _ in indexes]
+    if rows:
+        for i, digest in zip(indexes, digests):
+            digest.update('\x1f'.join([row[i] if i < len(row) else '' for row in rows]).encode())
+            digest.update(b'\x1f')
+    return digests
+
+def _hexdigest(digests):
+    return ''.join(digest.hexdigest() for digest in digests)
+
+def _grid_rows(spreadsheet, sheet_names):
+    """{name: worksheet grid height (an upper bound on data rows) or None}, from one metadata request"""
+    try:
+        with span('sheets.metadata'):
+            metadata = spreadsheet.fetch_sheet_metadata({'fields': 'sheets.properties(title,gridProperties.rowCount)'})
+    except Exception as e:
+        logger.warning("Worksheet sizes unavailable, streaming until an empty chunk: %s", e)
+        return dict.fromkeys(sheet_names)
+    rows = {sheet['properties']['title']: sheet['properties'].get('gridProperties', {}).get('rowCount')
+            for sheet in metadata.get('sheets', [])}
+    return {name: rows.get(name) for name in sheet_names}
+
+def stream_sheets(sheet_names, spreadsheet=None, chunk_rows=CHUNK_ROWS, max_chunk_bytes=MAX_CHUNK_BYTES,
+                  on_chunk=None, errors=None):
+    """Fetch worksheets in row-range chunks -> ({name: DataFrame}, {name: sync markers})
+
+    Each round trip asks for the next `chunk_rows` rows of every unfinished
+    worksheet in one batchGet. Chunks are normalized as they arrive and
+    copied into a FrameBuffer, so at most one round of raw values is alive at
+    a time; after the first round each sheet's chunk size is reduced if
+    needed to keep that round under `max_chunk_bytes`. A worksheet ends at
+    its grid row count, or at the first empty chunk if that is unknown. The
+    API drops trailing empty rows from every range, so blank rows at a chunk
+    boundary are restored when the next rows arrive, as a one-shot load
+    would have them.
+
+    `on_chunk(name, chunk, progress, partial_frames)` is called after every
+    chunk with {name: {'rows', 'expected', 'done'}} and a function returning
+    the rows loaded so far for every sheet, so callers can report progress,
+    fold the chunk into running aggregates or publish a partial view.
+    `errors` is filled like load_all_sheets'. The markers are what
+    SheetSyncEngine needs to resume with delta syncs.
+    """
+    if spreadsheet is None:
+        spreadsheet = get_spreadsheet()
+
+    grid = _grid_rows(spreadsheet, sheet_names)
+    buffers = {name: FrameBuffer((grid[name] or chunk_rows) - 1) for name in sheet_names}
+    sizes = dict.fromkeys(sheet_names, chunk_rows)
+    progress = {name: {'rows': 0, 'expected': grid[name] - 1 if grid[name] else None, 'done': False}
+                for name in sheet_names}
+    markers = {name: {'header': [], 'width': 0, 'row_count': 0, 'last_row': [], 'date_formats': []}
+               for name in sheet_names}
+    digests = {}
+    next_row = dict.fromkeys(sheet_names, 1)
+
+    while True:
+        active = [name for name in sheet_names if not progress[name]['done']]
+        if not active:
+            break
+        ranges = [f"{_sheet_range(name)}!{next_row[name]}:{next_row[name] + sizes[name] - 1}" for name in active]
+        value_ranges = _batch_get(spreadsheet, ranges).get('valueRanges', [])
+        for i, name in enumerate(active):
+            # Popped so each sheet's raw values are freed as soon as its chunk is normalized
+            rows = value_ranges[i].pop('values', []) if i < len(value_ranges) else []
+            start, returned = next_row[name], len(rows)
+            next_row[name] += sizes[name]
+            marker = markers[name]
+            chunk = pd.DataFrame()
+            if start == 1:
+                if not rows:
+                    progress[name]['done'] = True
+                    continue
+                marker['header'], marker['width'] = _trim(rows[0]), len(rows[0])
+                marker['row_count'], marker['last_row'] = 1, marker['header']
+                digests[name] = _watch_digest([], _watch_indexes(marker['header']))
+                rows, start = rows[1:], 2
+            header = (marker['header'] + [''] * marker['width'])[:marker['width']]
+            if start == 2 and not rows:
+                # Header only: the buffer still gets the normalized columns, as values_to_dataframe would
+                buffers[name].append(values_to_dataframe([header], date_formats=marker['date_formats']))
+
+            with span('sheets.chunk', rows=len(rows)):
+                if rows:
+                    # Blank rows trimmed off the end of earlier chunks come back as empty rows
+                    first_row = marker['row_count'] + 1
+                    data_rows = [[]] * (start - first_row) + rows
+                    sheet_errors = errors.setdefault(name, []) if errors is not None else None
+                    # The first chunk detects the sheet's date formats; later chunks reuse them
+                    chunk = values_to_dataframe([header] + data_rows, sheet_errors, first_row=first_row,
+                                                date_formats=marker['date_formats'])
+                    buffers[name].append(chunk)
+                    _watch_digest(data_rows, _watch_indexes(marker['header']), digests[name])
+                    # Sheet row of the last returned row, and that row as the delta-sync anchor
+                    marker['row_count'] = start + len(rows) - 1
+                    marker['last_row'] = _trim(rows[-1])
+                    row_bytes = _raw_row_bytes(rows)
+                    if row_bytes:
+                        budget_rows = int(max_chunk_bytes / len(active) / row_bytes)
+                        sizes[name] = max(min(sizes[name], budget_rows), 1)
+                    del data_rows
+            del rows
+
+            progress[name]['rows'] = buffers[name].length
+            progress[name]['done'] = next_row[name] > grid[name] if grid[name] else returned == 0
+            if on_chunk is not None and not chunk.empty:
+                on_chunk(name, chunk, progress, lambda: {n: buffers[n].frame() for n in sheet_names})
+
+    for name in sheet_names:
+        markers[name]['watch_digest'] = _hexdigest(digests.get(name, []))
+    return {name: buffers[name].frame(final=True) for name in sheet_names}, markers
+
+def _trim(row):
+    """Drop trailing empty cells so rows compare like the API returns them"""
+    row = list(row)
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+class SheetSyncEngine:
+    """Keeps worksheets in memory and fetches only rows appended since the last sync
+
+    Each sync requests, per worksheet, the header row, everything from the
+    last known row onwards, and the WATCH_COLUMNS of the known rows. If the
+    header, that last row or a digest of the watched cells changed (an edit or
+    deletion of existing rows) the worksheet is fully reloaded; otherwise only
+    the new tail is parsed and appended. Every `full_reload_every` syncs all
+    worksheets are re-downloaded to pick up edits to the other columns.
+    With `chunk_rows`, full reloads stream in chunks (see stream_sheets).
+    """
+
+    def __init__(self, sheet_names, spreadsheet=None, full_reload_every=12, chunk_rows=None):
+        self.sheet_names = list(sheet_names)
+        self.spreadsheet = spreadsheet
+        self.full_reload_every = full_reload_every
+        self.chunk_rows = chunk_rows
+        self.version = 0
+        # Process-unique, since every engine's version counter starts at 0
+        self.id = uuid.uuid4().hex
+        # Bumped whenever frames are replaced rather than appended to (reloads, restores),
+        # so incremental consumers know to rebuild instead of applying new rows
+        self.generation = 0
+        self.fetched_at = None
+        # Shared-cache generation the state was last restored from or published as
+        self.shared_generation = None
+        self._state = {}
+        self._syncs = 0
+        self._lock = threading.Lock()
+
+    def _get_spreadsheet(self):
+        if self.spreadsheet is None:
+            self.spreadsheet = get_spreadsheet()
+        return self.spreadsheet
+
+    def _store(self, name, values, frame, amount_errors, date_formats):
+        self._state[name] = {
+            'header': _trim(values[0]) if values else [],
+            'width': len(values[0]) if values else 0,
+            'row_count': len(values),
+            'last_row': _trim(values[-1]) if values else [],
+            'watch_digest': _hexdigest(_watch_digest(values[1:], _watch_indexes(_trim(values[0]) if values else []))),
+            'amount_errors': amount_errors,
+            # Formats detected on the full sheet, so delta tails parse ambiguous dates the same way
+            'date_formats': date_formats,
+            'frame': frame,
+        }
+
+    @property
+    def has_state(self):
+        return all(name in self._state for name in self.sheet_names)
+
+    def amount_errors(self):
+        """{name: [[sheet row, raw text], ...]} of amounts that could not be parsed"""
+        return {name: list(self._state[name].get('amount_errors', [])) for name in self.sheet_names if name in self._state}
+
+    def frames(self):
+        """Current {name: DataFrame} without syncing"""
+        return {name: self._state[name]['frame'] for name in self.sheet_names}
+
+    def export_state(self, name):
+        """JSON-serializable sync markers for one worksheet (frame excluded)"""
+        return {key: value for key, value in self._state[name].items() if key != 'frame'}
+
+    def restore(self, frames, states, fetched_at=None):
+        """Seed the engine from previously saved frames so the next sync is a delta"""
+        with self._lock:
+            for name in self.sheet_names:
+                self._state[name] = dict(states[name], frame=frames[name])
+            self.fetched_at = fetched_at
+            self.version += 1
+            self.generation += 1
+
+    def _full_reload(self, names, on_chunk=None):
+        if not names:
+            return
+        self.generation += 1
+        if self.chunk_rows:
+            errors = {}
+            frames, markers = stream_sheets(names, self._get_spreadsheet(), self.chunk_rows, on_chunk=on_chunk, errors=errors)
+            for name in names:
+                self._state[name] = dict(markers[name], amount_errors=errors.get(name, []), frame=frames[name])
+            return
+        frames = {}
+        response = _batch_get(self._get_spreadsheet(), [_sheet_range(name) for name in names])
+        value_ranges = response.get('valueRanges', [])
+        for i, name in enumerate(names):
+            values = value_ranges[i].get('values', []) if i < len(value_ranges) else []
+            amount_errors, date_formats = [], []
+            frames[name] = values_to_dataframe(values, amount_errors, date_formats=date_formats)
+            self._store(name, values, frames[name], amount_errors, date_formats)
+
+    def _tail_ranges(self, name):
+        """Header row, rows from the last known one on, then each watched column of the known rows"""
+        state = self._state[name]
+        last_col = _column_letter(max(state['width'], 1))
+        ranges = [
+            f"{_sheet_range(name)}!A1:{last_col}1",
+            f"{_sheet_range(name)}!A{state['row_count']}:{last_col}",
+        ]
+        if state['row_count'] > 1:
+            for i in _watch_indexes(state['header']):
+                col = _column_letter(i + 1)
+                ranges.append(f"{_sheet_range(name)}!{col}2:{col}{state['row_count']}")
+        return ranges
+
+    @timed('sheets.sync')
+    def sync(self, on_chunk=None, force_full=False):
+        """Bring every worksheet up to date -> {name: DataFrame}
+
+        `on_chunk` is passed to stream_sheets when worksheets are reloaded in
+        chunks. `force_full` reloads every worksheet instead of syncing deltas.
+        """
+        with self._lock:
+            self._syncs += 1
+            periodic = self.full_reload_every and self._syncs % self.full_reload_every == 0
+            reload_names = [name for name in self.sheet_names
+                            if force_full or periodic or not self._state.get(name, {}).get('row_count')]
+            delta_names = [name for name in self.sheet_names if name not in reload_names]
+            changed = False
+
+            if delta_names:
+                sheet_ranges = {name: self._tail_ranges(name) for name in delta_names}
+                ranges = [r for name in delta_names for r in sheet_ranges[name]]
+                value_ranges = _batch_get(self._get_spreadsheet(), ranges).get('valueRanges', [])
+                values = [value_range.get('values', []) for value_range in value_ranges]
+                values += [[]] * (len(ranges) - len(values))
+                offset = 0
+                for name in delta_names:
+                    state = self._state[name]
+                    header, tail, *watched = values[offset:offset + len(sheet_ranges[name])]
+                    offset += len(sheet_ranges[name])
+                    header_row = _trim(header[0]) if header else []
+                    anchor = _trim(tail[0]) if tail else None
+                    # Watched columns come back one cell per row, blank rows as [] and trailing ones dropped
+                    indexes = _watch_indexes(state['header'])
+                    known = state['row_count'] - 1
+                    watched += [[]] * (len(indexes) - len(watched))
+                    digests = [_watch_digest(column[:known] + [[]] * (known - len(column)), [0])[0]
+                               for column in watched]
+
+                    # Existing rows were edited or deleted -> reload the whole worksheet
+                    if (header_row != state['header'] or anchor != state['last_row']
+                            or _hexdigest(digests) != state.get('watch_digest')):
+                        reload_names.append(name)
+                        continue
+                    if len(tail) > 1:
+                        raw_header = (state['header'] + [''] * state['width'])[:state['width']]
+                        # tail[0] is the last known row, so tail[1] is sheet row row_count + 1
+                        new_rows = values_to_dataframe([raw_header] + tail[1:], state.setdefault('amount_errors', []),
+                                                       first_row=state['row_count'] + 1,
+                                                       date_formats=state.setdefault('date_formats', []))
+                        state['frame'] = append_frames(state['frame'], new_rows)
+                        state['row_count'] += len(tail) - 1
+                        state['last_row'] = _trim(tail[-1])
+                        state['watch_digest'] = _hexdigest(_watch_digest(tail[1:], indexes, digests))
+                        changed = True
+
+            self._full_reload(reload_names, on_chunk)
+            changed = changed or bool(reload_names)
+
+            self.fetched_at = time.time()
+            if changed:
+                self.version += 1
+            return {name: self._state[name]['frame'] for name in self.sheet_names}
+
+def save_snapshots(engine, frames):
+    """Persist the engine's current frames (with resume markers) to disk"""
+    for name, df in frames.items():
+        try:
+            with span('snapshot.save', rows=len(df)):
+                save_snapshot(name, df, engine.fetched_at, engine.export_state(name))
+        except Exception as e:
+            # A failed snapshot only costs the next cold start; never break the page
+            logger.warning("Snapshot write failed for %s: %s", name, e)
+
+def _revalidate(engine, on_refresh):
+    version = engine.version
+    try:
+        frames = engine.sync()
+    except Exception as e:
+        logger.warning("Background revalidation failed: %s", e)
+        return
+    if engine.version != version:
+        save_snapshots(engine, frames)
+        if on_refresh is not None:
+            on_refresh(frames)
+
+def load_with_snapshots(engine, on_refresh=None, on_chunk=None, force_full=False):
+    """Return frames for every engine worksheet, preferring a local snapshot on cold start
+
+    When the engine is empty and a complete snapshot set exists on disk it is
+    returned immediately and Sheets is revalidated on a background thread;
+    `on_refresh(frames)` is called there if newer data arrived. Otherwise a normal
+    (delta) sync runs, with `on_chunk` seeing any streamed reload, and the
+    snapshots are updated. `force_full` skips the snapshot and reloads everything.
+    """
+    if not engine.has_state and not force_full:
+        with span('snapshot.load'):
+            snapshots = {name: load_snapshot(name) for name in engine.sheet_names}
+        if all(snapshots.values()):
+            frames = {name: snap[0] for name, snap in snapshots.items()}
+            states = {name: snap[2] for name, snap in snapshots.items()}
+            engine.restore(frames, states, min(snap[1] for snap in snapshots.values()))
+            threading.Thread(target=_revalidate, args=(engine, on_refresh), daemon=True).start()
+            return frames
+
+    version = engine.version
+    frames = engine.sync(on_chunk, force_full=force_full)
+    if engine.version != version:
+        save_snapshots(engine, frames)
+    return frames
+
+def _adopt(engine, cache, manifest):
+    """Restore the engine from a shared generation unless it already has it -> frames (None if unreadable)"""
+    if manifest['generation'] == engine.shared_generation and engine.has_state:
+        return engine.frames()
+    if set(manifest['names']) != set(engine.sheet_names):
+        return None
+    frames = cache.read(manifest)
+    if frames is None:
+        return None
+    engine.restore(frames, manifest['states'], manifest['fetched_at'])
+    engine.shared_generation = manifest['generation']
+    return frames
+
+def _publish(engine, cache, force_full=False):
+    # Renew the lease after every streamed chunk, so a long reload never lets another replica take over
+    frames = engine.sync(on_chunk=lambda *_: cache.acquire(), force_full=force_full)
+    states = {name: engine.export_state(name) for name in engine.sheet_names}
+    engine.shared_generation = cache.write(frames, engine.fetched_at, states)
+    return frames
+
+def load_with_shared_cache(engine, cache, ttl=300, wait=None, force_full=False):
+    """Return frames for every engine worksheet, fetching from Sheets in at most one process
+
+    A generation younger than `ttl` seconds in the shared cache is used as is.
+    Otherwise the process that wins the cache's lease syncs (a delta from the
+    latest shared state) and publishes; the others wait up to `wait` seconds
+    (default: the lease length) for that generation. If none arrives they serve
+    the stale generation, or sync on their own as a last resort. `force_full`
+    ignores the cached generation's age and has the leader reload everything.
+    """
+    manifest = cache.manifest()
+    if manifest is not None and not force_full and time.time() - manifest['fetched_at'] < ttl:
+        frames = _adopt(engine, cache, manifest)
+        if frames is not None:
+            return frames
+
+    with cache.lease() as leader:
+        if leader:
+            # Someone may have published between the freshness check and the lease
+            manifest = cache.manifest()
+            if manifest is not None and not force_full:
+                frames = _adopt(engine, cache, manifest)
+                if frames is not None and time.time() - manifest['fetched_at'] < ttl:
+                    return frames
+            return _publish(engine, cache, force_full)
+
+    published = cache.wait_for(manifest['generation'] if manifest else None, wait or cache.lease_seconds)
+    for candidate in (published, manifest):
+        if candidate is not None:
+            frames = _adopt(engine, cache, candidate)
+            if frames is not None:
+                return frames
+    logger.warning("No shared data published in time; fetching from Sheets directly")
+    return engine.sync(force_full=force_full)
 
 def load_google_sheets_data(sheet_name):
     """Load data and normalize column names"""
     try:
-        # Define scope
-        scope = ['https://www.googleapis.com/auth/spreadsheets.readonly']
-        
-        # Load credentials
-        credentials = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"], scopes=scope
-        )
-        
-        client = gspread.authorize(credentials)
-        spreadsheet_id = st.secrets["sheets"]["spreadsheet_id"]
-        worksheet = client.open_by_key(spreadsheet_id).worksheet(sheet_name)
-        
-        data = worksheet.get_all_values()
-        if not data:
-            return pd.DataFrame()
-        
-        # Create DataFrame
-        headers = data[0]
-        rows = data[1:]
-        df = pd.DataFrame(rows, columns=headers)
-        
-        # --- FIX 1: Rename Columns to Match Code Expectations ---
-        # Maps 'Total Earned' from Sheet -> 'Amount' for Python
-        column_mapping = {
-            'Total Earned': 'Amount',
-            'Doctor / Location': 'Doctor',
-            'Patients Seen / Type': 'Type'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # --- FIX 2: Clean Currency Strings ("$750.00" -> 750.00) ---
-        if 'Amount' in df.columns:
-            # Remove '$', ',', and empty strings
-            df['Amount'] = df['Amount'].astype(str).str.replace('$', '', regex=False)
-            df['Amount'] = df['Amount'].str.replace(',', '', regex=False)
-            df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce').fillna(0)
-
-        # --- FIX 3: Flexible Date Parsing ---
-        if 'Date' in df.columns:
-            # Try ISO format first (YYYY-MM-DD), then DD/MM/YYYY
-            df['Date'] = pd.to_datetime(df['Date'], format='mixed', errors='coerce')
-            
-        return df
-        
+        return load_all_sheets([sheet_name])[sheet_name]
+
     except Exception as e:
         st.error(f"Error loading {sheet_name}: {str(e)}")
         return pd.DataFrame()
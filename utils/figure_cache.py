@@ -0,0 +1,109 @@
+"""
+Process-wide LRU cache of built Plotly figures keyed by a fingerprint of their input data
+"""
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Total estimated figure payload kept in memory before least-recently-used eviction
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+def fingerprint(df, columns=None):
+    """Cheap content hash of the given columns (row order and values matter)"""
+    if df is None:
+        return None
+    if columns is not None:
+        df = df[[column for column in columns if column in df.columns]]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((df.shape, list(df.columns))).encode())
+    if len(df.columns) and len(df):
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _estimate_size(fig):
+    """Approximate bytes held by a figure: array-valued trace properties dominate"""
+    size = 1024
+    for trace in fig.data:
+        for prop in ('x', 'y', 'values', 'labels', 'text', 'customdata'):
+            value = getattr(trace, prop, None) if prop in trace else None
+            if value is None:
+                continue
+            size += value.nbytes if isinstance(value, np.ndarray) else 64 * len(value)
+    return size
+
+class FigureCache:
+    """Bounded LRU of figures with size-based eviction and hit/miss counters"""
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        fig = build()
+        size = _estimate_size(fig)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (fig, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+figure_cache = FigureCache()
+
+def cached_figure(columns):
+    """Decorator: memoize a chart builder on its DataFrame arguments' `columns`
+
+    Callers may pass `data_version=` (e.g. the bundle's (engine id, version)
+    pair, unique across engines) to key on that instead of hashing the frames. Returned figures are shared between
+    callers and must not be mutated.
+    """
+    def decorator(builder):
+        @functools.wraps(builder)
+        def wrapper(*args, data_version=None, **kwargs):
+            if data_version is not None:
+                # Row counts guard against two different frames sharing one version
+                data_key = ('version', data_version) + tuple(len(arg) for arg in args if isinstance(arg, pd.DataFrame))
+            else:
+                data_key = tuple(
+                    fingerprint(arg, columns) if isinstance(arg, pd.DataFrame) else repr(arg) for arg in args
+                )
+            key = (builder.__qualname__, data_key, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+            return figure_cache.get_or_build(key, lambda: builder(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,147 @@
+"""
+Per-doctor monthly income series and vectorized multi-month forecasts
+"""
+import threading
+import numpy as np
+import pandas as pd
+from utils.money import AMOUNT_COLUMN, to_dollars
+
+METHODS = {
+    'moving_average': 'Moving average (3 mo)',
+    'exponential_smoothing': 'Exponential smoothing',
+    'seasonal_naive': 'Seasonal naive (same month last year)',
+}
+
+# Two-sided 95% normal quantile for the confidence bands
+Z_95 = 1.96
+
+def _month_ordinal(dates):
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy()
+
+class ForecastEngine:
+    """Doctor x month matrix of received income, updated incrementally as rows are appended
+
+    Rows are ingested by position: `update()` only reads rows added since the
+    last call, and rebuilds from scratch when the data load's generation changes
+    (earlier rows may have been edited or removed) or the frame shrinks.
+    The matrix holds exact int64 cents; forecasts are estimates in dollars.
+    """
+
+    def __init__(self):
+        self.doctors = []
+        self._doctor_rows = {}
+        self.first_month = None  # ordinal (year * 12 + month - 1) of column 0
+        self.matrix = np.zeros((0, 0), dtype=np.int64)
+        self.rows_seen = 0
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        self.doctors, self._doctor_rows = [], {}
+        self.first_month, self.matrix = None, np.zeros((0, 0), dtype=np.int64)
+        self.rows_seen = 0
+
+    def _ingest(self, rows):
+        rows = rows[rows['Date'].notna()]
+        if rows.empty:
+            return
+        months = _month_ordinal(rows['Date'])
+        doctors = rows['Doctor'].astype(str).to_numpy() if 'Doctor' in rows.columns else np.full(len(rows), '')
+        for doctor in pd.unique(doctors):
+            if doctor not in self._doctor_rows:
+                self._doctor_rows[doctor] = len(self.doctors)
+                self.doctors.append(doctor)
+
+        # Grow the matrix to cover any new doctors or months
+        lo, hi = int(months.min()), int(months.max())
+        if self.first_month is None:
+            self.first_month = lo
+        pad_left = max(0, self.first_month - lo)
+        pad_right = max(0, hi - (self.first_month + self.matrix.shape[1] - 1))
+        pad_rows = len(self.doctors) - self.matrix.shape[0]
+        self.matrix = np.pad(self.matrix, ((0, pad_rows), (pad_left, pad_right)))
+        self.first_month -= pad_left
+
+        doctor_idx = np.fromiter((self._doctor_rows[d] for d in doctors), dtype=np.int64, count=len(doctors))
+        np.add.at(self.matrix, (doctor_idx, months - self.first_month), rows[AMOUNT_COLUMN].to_numpy(dtype='int64', na_value=0))
+
+    def update(self, payments, generation=None):
+        """Fold in payments appended since the last update
+
+        `generation` identifies the data load, as for AgingIndex.sync: while
+        it is unchanged the frame is assumed to only have grown.
+        """
+        with self._lock:
+            if payments.empty or AMOUNT_COLUMN not in payments.columns or 'Date' not in payments.columns:
+                self._reset()
+                return self
+            if len(payments) < self.rows_seen or generation != self._generation:
+                self._reset()
+                self._generation = generation
+            if len(payments) > self.rows_seen:
+                self._ingest(payments.iloc[self.rows_seen:])
+                self.rows_seen = len(payments)
+            return self
+
+    def history(self, through=None):
+        """(doctors, month ordinals, cents matrix) up to and including month ordinal `through`"""
+        if self.first_month is None:
+            return [], np.array([], dtype=np.int64), np.zeros((0, 0), dtype=np.int64)
+        months = self.first_month + np.arange(self.matrix.shape[1])
+        if through is not None:
+            if through >= months[-1]:
+                extra = through - months[-1]
+                matrix = np.pad(self.matrix, ((0, 0), (0, extra)))
+                months = self.first_month + np.arange(matrix.shape[1])
+            else:
+                matrix = self.matrix[:, months <= through]
+                months = months[months <= through]
+            return list(self.doctors), months, matrix
+        return list(self.doctors), months, self.matrix
+
+    def forecast(self, horizon=3, method='moving_average', window=3, alpha=0.3, as_of=None):
+        """Forecast `horizon` months after the last complete month, for every doctor at once
+
+        Returns a long DataFrame: Doctor, Month, Forecast, Lower, Upper (95% band, dollars).
+        """
+        as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.now()
+        last_complete = as_of.year * 12 + as_of.month - 2
+        with self._lock:
+            doctors, months, series = self.history(through=last_complete)
+            series = to_dollars(series)
+        if not doctors or series.shape[1] == 0:
+            return pd.DataFrame(columns=['Doctor', 'Month', 'Forecast', 'Lower', 'Upper'])
+
+        steps = np.arange(1, horizon + 1)
+        if method == 'exponential_smoothing':
+            level = series[:, 0].copy()
+            errors = np.zeros_like(series)
+            for t in range(1, series.shape[1]):
+                errors[:, t] = series[:, t] - level
+                level = alpha * series[:, t] + (1 - alpha) * level
+            sigma = errors[:, 1:].std(axis=1) if series.shape[1] > 1 else np.zeros(len(doctors))
+            point = np.repeat(level[:, None], horizon, axis=1)
+            spread = sigma[:, None] * np.sqrt(1 + (steps - 1) * alpha ** 2)[None, :]
+        elif method == 'seasonal_naive' and series.shape[1] >= 12:
+            last_year = series[:, -12:]
+            point = last_year[:, (steps - 1) % 12]
+            seasonal_diff = series[:, 12:] - series[:, :-12]
+            sigma = seasonal_diff.std(axis=1) if seasonal_diff.shape[1] else series[:, -12:].std(axis=1)
+            spread = sigma[:, None] * np.sqrt(np.ceil(steps / 12))[None, :]
+        else:
+            recent = series[:, -window:]
+            point = np.repeat(recent.mean(axis=1)[:, None], horizon, axis=1)
+            sigma = recent.std(axis=1)
+            spread = np.repeat(sigma[:, None], horizon, axis=1)
+
+        lower = np.maximum(point - Z_95 * spread, 0)
+        upper = point + Z_95 * spread
+        future = last_complete + steps
+        labels = [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in future]
+        return pd.DataFrame({
+            'Doctor': np.repeat(doctors, horizon),
+            'Month': np.tile(labels, len(doctors)),
+            'Forecast': point.ravel(),
+            'Lower': lower.ravel(),
+            'Upper': upper.ravel(),
+        })
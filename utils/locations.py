@@ -0,0 +1,106 @@
+"""
+Location registry: which doctors belong to which clinic, and fast per-location row lookup
+"""
+import numpy as np
+import pandas as pd
+
+# Location key of doctors no location lists; reserved, so no configured location can merge with it
+OTHER_LOCATION = '__other__'
+
+# Used when neither secrets nor a Locations sheet define any clinics
+DEFAULT_LOCATIONS = {
+    'kitchener': {'label': 'Kitchener', 'icon': '🏥', 'doctors': ['Dr. Tripic', 'Dr. Cartagena']},
+    'london': {'label': 'London', 'icon': '🏛️', 'doctors': ['Dr. Tugalov']},
+}
+
+class LocationRegistry:
+    """Maps doctors to locations and builds positional row indexes per location"""
+
+    def __init__(self, locations):
+        if OTHER_LOCATION in locations:
+            raise ValueError(f"Location key {OTHER_LOCATION!r} is reserved for unassigned doctors")
+        self.locations = {
+            key: {
+                'label': spec.get('label', key.title()),
+                'icon': spec.get('icon', '📍'),
+                'doctors': list(spec.get('doctors', [])),
+            }
+            for key, spec in locations.items()
+        }
+        self.doctor_locations = {
+            doctor: key for key, spec in self.locations.items() for doctor in spec['doctors']
+        }
+        self._keys = list(self.locations)
+
+    @property
+    def fingerprint(self):
+        """Hashable summary of the doctor -> location map, for keying caches built from it"""
+        return tuple(sorted(self.doctor_locations.items())) + tuple(self._keys)
+
+    @property
+    def keys(self):
+        return list(self._keys)
+
+    def label(self, key):
+        return self.locations[key]['label']
+
+    def icon(self, key):
+        return self.locations[key]['icon']
+
+    def doctors(self, key):
+        return list(self.locations[key]['doctors'])
+
+    def categorize(self, df):
+        """Make Doctor a Categorical whose categories start with every registered doctor"""
+        if 'Doctor' not in df.columns:
+            return df
+        observed = df['Doctor'].dropna().astype(str).unique()
+        categories = list(self.doctor_locations) + sorted(set(observed) - set(self.doctor_locations))
+        df['Doctor'] = pd.Categorical(df['Doctor'].astype(object), categories=categories)
+        return df
+
+    def build_index(self, df):
+        """location -> sorted row positions, computed from category codes (no string compares)"""
+        if 'Doctor' not in df.columns or not isinstance(df['Doctor'].dtype, pd.CategoricalDtype):
+            return None
+        # Lookup table: category code -> location number (-1 = unassigned / missing)
+        location_numbers = {key: i for i, key in enumerate(self._keys)}
+        lookup = np.array(
+            [location_numbers.get(self.doctor_locations.get(doctor), -1) for doctor in df['Doctor'].cat.categories] + [-1],
+            dtype=np.int64,
+        )
+        row_locations = lookup[df['Doctor'].cat.codes.to_numpy()]
+        order = np.argsort(row_locations, kind='stable')
+        bounds = np.searchsorted(row_locations[order], np.arange(-1, len(self._keys) + 1))
+        return {key: order[bounds[i + 1]:bounds[i + 2]] for i, key in enumerate(self._keys)}
+
+    def take(self, df, index, key):
+        """Rows of `df` at `key`; frames without a Doctor column are returned as-is"""
+        if index is None:
+            return df
+        return df.take(index[key])
+
+def load_registry(config=None, sheet_frame=None):
+    """Build the registry from a Locations sheet, a secrets/config mapping, or the defaults
+
+    `sheet_frame` needs Doctor and Location columns (optional Icon/Label).
+    `config` maps location keys to {label, icon, doctors}.
+    """
+    if sheet_frame is not None and {'Doctor', 'Location'} <= set(sheet_frame.columns):
+        locations = {}
+        for row in sheet_frame.itertuples(index=False):
+            label = str(row.Location).strip()
+            if not label:
+                continue
+            spec = locations.setdefault(label.lower(), {
+                'label': label,
+                'icon': getattr(row, 'Icon', '') or '📍',
+                'doctors': [],
+            })
+            spec['doctors'].append(str(row.Doctor).strip())
+        if locations:
+            return LocationRegistry(locations)
+
+    # Non-mapping entries (e.g. sheet = "Locations") aren't locations; with none left, use the defaults
+    locations = {key: dict(spec) for key, spec in (config or {}).items() if hasattr(spec, 'get')}
+    return LocationRegistry(locations or DEFAULT_LOCATIONS)
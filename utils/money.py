@@ -0,0 +1,92 @@
+"""
+Exact money: amounts are int64 cents from parsing through aggregation, dollars only for display
+"""
+import numpy as np
+import pandas as pd
+
+# Normalized frames carry amounts in this nullable Int64 column (missing/unparseable -> <NA>)
+AMOUNT_COLUMN = 'AmountCents'
+CENTS_PER_DOLLAR = 100
+
+class Money(int):
+    """An exact amount in cents
+
+    Addition, subtraction and negation stay in cents, so sums never drift.
+    Format specs apply to the dollar value (f"${m:,.2f}" -> "$1,234.56") and
+    str() gives the same with the sign in front of the dollar sign.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dollars(cls, dollars):
+        return cls(round(float(dollars) * CENTS_PER_DOLLAR))
+
+    @property
+    def dollars(self):
+        return int(self) / CENTS_PER_DOLLAR
+
+    def __add__(self, other):
+        return Money(int(self) + int(other)) if isinstance(other, (int, np.integer)) else NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Money(int(self) - int(other)) if isinstance(other, (int, np.integer)) else NotImplemented
+
+    def __rsub__(self, other):
+        return Money(int(other) - int(self)) if isinstance(other, (int, np.integer)) else NotImplemented
+
+    def __neg__(self):
+        return Money(-int(self))
+
+    def __abs__(self):
+        return Money(abs(int(self)))
+
+    def scale(self, factor):
+        """Multiply by a non-integer factor (rates, shares), rounding to the nearest cent"""
+        return Money(round(int(self) * factor))
+
+    def __format__(self, spec):
+        return format(self.dollars, spec) if spec else str(self)
+
+    def __str__(self):
+        return format_money(self)
+
+    def __repr__(self):
+        return f"Money({format_money(self)})"
+
+def format_money(cents):
+    """'$1,234.56' / '-$50.00' from integer cents"""
+    cents = int(cents)
+    sign = '-' if cents < 0 else ''
+    dollars, remainder = divmod(abs(cents), CENTS_PER_DOLLAR)
+    return f"{sign}${dollars:,}.{remainder:02d}"
+
+def cents_from_dollars(values):
+    """Float dollar amounts -> int64 cents, rounded to the nearest cent (NaN stays missing)"""
+    values = np.asarray(values, dtype='float64')
+    cents = pd.array(np.rint(np.nan_to_num(values * CENTS_PER_DOLLAR)).astype(np.int64), dtype='Int64')
+    cents[np.isnan(values)] = pd.NA
+    return cents
+
+def total(values):
+    """Exact sum of a cents column as Money (missing values skipped)"""
+    return Money(int(values.sum())) if len(values) else Money(0)
+
+def to_dollars(values):
+    """Cents (Series, DataFrame, array or scalar) -> float dollars for charts and tables; <NA> -> NaN"""
+    if isinstance(values, (pd.Series, pd.DataFrame)):
+        return values.astype('float64') / CENTS_PER_DOLLAR
+    if isinstance(values, (int, np.integer)):
+        return int(values) / CENTS_PER_DOLLAR
+    return np.asarray(values, dtype='float64') / CENTS_PER_DOLLAR
+
+def display_frame(df):
+    """Swap the cents column for a dollar 'Amount' column in a (small) frame about to be shown"""
+    if AMOUNT_COLUMN not in df.columns:
+        return df
+    position = df.columns.get_loc(AMOUNT_COLUMN)
+    shown = df.drop(columns=AMOUNT_COLUMN)
+    shown.insert(position, 'Amount', to_dollars(df[AMOUNT_COLUMN]))
+    return shown
@@ -0,0 +1,216 @@
+"""
+Vectorized normalization of raw sheet columns (currency, dates, categories)
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from utils.money import AMOUNT_COLUMN, cents_from_dollars
+
+# Maps 'Total Earned' from Sheet -> 'Amount' for Python
+COLUMN_MAPPING = {
+    'Total Earned': 'Amount',
+    'Doctor / Location': 'Doctor',
+    'Patients Seen / Type': 'Type'
+}
+
+CATEGORY_COLUMNS = ['Doctor', 'Status', 'Type']
+
+# A cleaned amount must look like this before it is converted (up to 15 integer digits)
+_NUMBER_PATTERN = r'^-?(\d{1,15}(\.\d*)?|\.\d+)$'
+# The common case, which casts straight to decimal cents
+_CENTS_PATTERN = r'^-?\d{1,15}(\.\d{1,2})?$'
+# Decoration a money cell may carry around the number: currency codes, "$", "," and spaces.
+# Nothing else is stripped, so text that merely contains digits ("Dec 5") stays unparseable.
+_CURRENCY_CODES = r'(?i)\b(CAD|USD)\b'
+_CURRENCY_NOISE = r'[\s$,]'
+# Accounting negatives: "(50)" -> "-50" (and "(-50)" -> "-50")
+_PARENTHESES = r'^\(-?(.*)\)$'
+
+# Tried in order on a sample; ties keep the earlier format (month-first, as
+# format='mixed' used to resolve "01/02/2024")
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%Y/%m/%d',
+    '%d-%m-%Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%b %d, %Y',
+    '%B %d, %Y',
+    '%d %b %Y',
+    '%d %B %Y',
+]
+
+DATE_SAMPLE_SIZE = 200
+
+def _to_arrow_strings(series):
+    """Trimmed Arrow string array for a raw sheet column (no Python-level loop)"""
+    values = series.array
+    if hasattr(values, '__arrow_array__'):
+        arr = pa.array(values)
+    else:
+        arr = pa.array(series.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    return pc.utf8_trim_whitespace(arr)
+
+def _split_cents(cleaned):
+    """Convert cleaned decimal strings to int64 cents exactly (half-up on the third decimal)
+
+    Returns (cents, valid); anything that isn't a plain number is invalid.
+    Integer and fraction digits are read separately, so "1.005" is 101 cents
+    rather than whatever a float round trip makes of it.
+    """
+    valid = pc.fill_null(pc.match_substring_regex(cleaned, _NUMBER_PATTERN), False)
+    numbers = pc.if_else(valid, cleaned, pa.scalar('0'))
+    negative = pc.starts_with(numbers, '-').to_numpy(zero_copy_only=False)
+    parts = pc.extract_regex(pc.utf8_ltrim(numbers, '-'), r'^(?P<whole>\d*)\.?(?P<fraction>\d*)$')
+    whole = pc.struct_field(parts, 'whole')
+    whole = pc.cast(pc.if_else(pc.equal(whole, ''), pa.scalar('0'), whole), pa.int64()).to_numpy(zero_copy_only=False)
+    thousandths = pc.utf8_slice_codeunits(pc.utf8_rpad(pc.struct_field(parts, 'fraction'), 3, '0'), 0, 3)
+    digits = pc.cast(thousandths, pa.int64()).to_numpy(zero_copy_only=False)
+    cents = whole * 100 + digits // 10 + (digits % 10 >= 5)
+    cents = np.where(negative, -cents, cents)
+    return cents, valid.to_numpy(zero_copy_only=False)
+
+def _to_cents(cleaned):
+    """Convert cleaned decimal strings to int64 cents exactly -> (cents, valid)
+
+    Amounts with at most two decimals (nearly all of them) are cast to
+    decimal128 cents in one Arrow pass; only the rest go through _split_cents.
+    """
+    plain = pc.fill_null(pc.match_substring_regex(cleaned, _CENTS_PATTERN), False)
+    decimals = pc.cast(pc.if_else(plain, cleaned, pa.scalar('0')), pa.decimal128(17, 2))
+    cents = pc.cast(pc.multiply(decimals, pa.scalar(100, pa.decimal128(3, 0))), pa.int64())
+    cents = cents.to_numpy(zero_copy_only=False, writable=True)
+    valid = plain.to_numpy(zero_copy_only=False, writable=True)
+    rest = np.flatnonzero(~valid)
+    if len(rest):
+        cents[rest], valid[rest] = _split_cents(pc.take(cleaned, pa.array(rest)))
+    return cents, valid
+
+def normalize_currency(series, errors=None):
+    """Parse currency strings to nullable Int64 cents ("$1,234.00" -> 123400, "(CAD 50)" -> -5000)
+
+    The common "$1,234.00" shape takes two literal Arrow passes; only rows that
+    still aren't plain numbers (parentheses, CAD/USD markers, spaces) go
+    through the regex cleanup, and anything else is left unparsed. Blank and unparseable cells become <NA>;
+    if `errors` is a list, (index label, raw text) of each unparseable
+    non-blank cell is appended to it.
+    """
+    if pd.api.types.is_float_dtype(series):
+        return pd.Series(cents_from_dollars(series.to_numpy()), index=series.index, name=series.name)
+    if pd.api.types.is_integer_dtype(series):
+        return (series * 100).astype('Int64')
+
+    arr = _to_arrow_strings(series)
+    cleaned = pc.replace_substring(pc.replace_substring(arr, '$', ''), ',', '')
+    cents, valid = _to_cents(cleaned)
+
+    lengths = pc.fill_null(pc.utf8_length(arr), 0).to_numpy(zero_copy_only=False)
+    odd = np.flatnonzero(~valid & (lengths > 0))
+    if len(odd):
+        subset = pc.take(arr, pa.array(odd))
+        subset = pc.replace_substring_regex(subset, _CURRENCY_CODES, '')
+        subset = pc.replace_substring_regex(subset, _CURRENCY_NOISE, '')
+        subset = pc.replace_substring_regex(subset, _PARENTHESES, '-\\1')
+        cents[odd], valid[odd] = _to_cents(subset)
+        if errors is not None:
+            failed = odd[~valid[odd]]
+            errors.extend(zip(series.index[failed].tolist(), pc.take(arr, pa.array(failed)).to_pylist()))
+
+    return pd.Series(pd.arrays.IntegerArray(cents, ~valid), index=series.index, name=series.name)
+
+def _parse_format(arr, fmt):
+    return pc.strptime(arr, format=fmt, unit='s', error_is_null=True)
+
+def detect_date_format(arr, sample_size=DATE_SAMPLE_SIZE):
+    """Pick the fixed format that parses most of a sample of non-empty strings, or None"""
+    sample = pc.filter(arr, pc.fill_null(pc.greater(pc.utf8_length(arr), 0), False))[:sample_size]
+    if len(sample) == 0:
+        return None
+
+    best_format, best_hits = None, 0
+    for fmt in DATE_FORMATS:
+        hits = len(sample) - _parse_format(sample, fmt).null_count
+        if hits > best_hits:
+            best_format, best_hits = fmt, hits
+            if hits == len(sample):
+                break
+    return best_format
+
+def normalize_dates(series, date_formats=None):
+    """Parse dates to datetime64[ns] with fixed-format vectorized passes
+
+    The dominant format is detected on a sample and applied to the whole
+    column; rows it misses are re-detected the same way, and only what no
+    known format matches falls back to per-element inference.
+
+    `date_formats` carries a sheet's formats between batches: formats already
+    in the list are applied first, in order, and newly detected ones are
+    appended. Pass the same list for a sheet's delta tails and chunks so an
+    ambiguous "03/04/2025" reads the same way as it would in a full reload.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype('datetime64[ns]')
+
+    arr = _to_arrow_strings(series)
+    parsed = np.full(len(arr), np.datetime64('NaT'), dtype='datetime64[ns]')
+    remaining = np.flatnonzero(pc.fill_null(pc.utf8_length(arr), 0).to_numpy(zero_copy_only=False) > 0)
+
+    formats = date_formats if date_formats is not None else []
+    attempt = 0
+    while len(remaining):
+        subset = pc.take(arr, pa.array(remaining))
+        known = attempt < len(formats)
+        if known:
+            fmt = formats[attempt]
+        else:
+            fmt = detect_date_format(subset)
+            if fmt is None:
+                break
+            formats.append(fmt)
+        attempt += 1
+        result = _parse_format(subset, fmt)
+        hit = result.is_valid().to_numpy(zero_copy_only=False)
+        if not hit.any():
+            # A sheet format this batch happens not to use
+            if known:
+                continue
+            break
+        parsed[remaining[hit]] = result.to_numpy(zero_copy_only=False)[hit].astype('datetime64[ns]')
+        remaining = remaining[~hit]
+
+    if len(remaining):
+        leftovers = series.iloc[remaining].astype(str)
+        parsed[remaining] = pd.to_datetime(leftovers, format='mixed', errors='coerce').to_numpy(dtype='datetime64[ns]')
+
+    return pd.Series(parsed, index=series.index, name=series.name)
+
+def normalize_frame(df, errors=None, date_formats=None):
+    """Rename sheet columns and coerce amount/Date/category columns to explicit dtypes
+
+    The sheet's amount column becomes AMOUNT_COLUMN (Int64 cents); see
+    normalize_currency for `errors` and normalize_dates for `date_formats`.
+    """
+    df = df.rename(columns=COLUMN_MAPPING)
+
+    if 'Amount' in df.columns:
+        df[AMOUNT_COLUMN] = normalize_currency(df.pop('Amount'), errors)
+
+    if 'Date' in df.columns:
+        df['Date'] = normalize_dates(df['Date'], date_formats)
+
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+
+    return df
+
+def append_frames(base, new_rows):
+    """Concatenate normalized frames, keeping category columns categorical"""
+    combined = pd.concat([base, new_rows], ignore_index=True)
+    for column in CATEGORY_COLUMNS:
+        if column in combined.columns and not isinstance(combined[column].dtype, pd.CategoricalDtype):
+            combined[column] = combined[column].astype('category')
+    return combined
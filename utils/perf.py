@@ -0,0 +1,190 @@
+"""
+Lightweight hot-path instrumentation: stage timings, row counts and memory deltas in a ring buffer
+"""
+import functools
+import io
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# Samples kept per process; old ones fall off the end
+MAX_SAMPLES = 5000
+MAX_RERUNS = 200
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def _rss_bytes():
+    """Current resident set size (Linux /proc; None where unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _row_count(value):
+    """Rows in a DataFrame result, or summed over a dict of DataFrames"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, dict):
+        counts = [len(v) for v in value.values() if isinstance(v, (pd.DataFrame, pd.Series))]
+        return sum(counts) if counts else None
+    return None
+
+class PerfRecorder:
+    """Thread-safe ring buffers of stage samples and whole-rerun timings
+
+    A sample is (stage, seconds, rows, memory delta in bytes, rerun id, ended
+    at). Stages run inside a rerun (see `rerun`) are attributed to it so the
+    slowest reruns can be broken down; stages on background threads carry no
+    rerun id.
+    """
+
+    def __init__(self, max_samples=MAX_SAMPLES, max_reruns=MAX_RERUNS):
+        self._samples = deque(maxlen=max_samples)
+        self._reruns = deque(maxlen=max_reruns)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_rerun = 0
+
+    def record(self, stage, seconds, rows=None, memory_delta=None):
+        rerun = getattr(self._local, 'rerun', None)
+        sample = (stage, seconds, rows, memory_delta, rerun['id'] if rerun else None, time.time())
+        with self._lock:
+            self._samples.append(sample)
+        if rerun is not None:
+            rerun['stages'][stage] = rerun['stages'].get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage, rows=None):
+        """Time a block; set `info['rows']` inside it to record a row count"""
+        info = {'rows': rows}
+        rss = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            seconds = time.perf_counter() - start
+            end_rss = _rss_bytes()
+            delta = end_rss - rss if rss is not None and end_rss is not None else None
+            self.record(stage, seconds, info['rows'], delta)
+
+    def timed(self, stage):
+        """Decorator form of `span`; rows are taken from a DataFrame (or dict of them) result"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage) as info:
+                    result = func(*args, **kwargs)
+                    info['rows'] = _row_count(result)
+                return result
+            return wrapper
+        return decorator
+
+    def start_rerun(self, page):
+        """Attribute the stages that follow on this thread to a new rerun record"""
+        with self._lock:
+            self._next_rerun += 1
+            rerun_id = self._next_rerun
+        self._local.rerun = {'id': rerun_id, 'page': page, 'stages': {}, 'started_at': time.time(),
+                             'start': time.perf_counter()}
+        return rerun_id
+
+    def finish_rerun(self):
+        """Close this thread's rerun record (no-op if none is open)"""
+        rerun = getattr(self._local, 'rerun', None)
+        if rerun is None:
+            return
+        self._local.rerun = None
+        rerun['seconds'] = time.perf_counter() - rerun.pop('start')
+        with self._lock:
+            self._reruns.append(rerun)
+
+    @contextmanager
+    def rerun(self, page):
+        self.start_rerun(page)
+        try:
+            yield
+        finally:
+            self.finish_rerun()
+
+    def samples(self):
+        with self._lock:
+            samples = list(self._samples)
+        return pd.DataFrame(samples, columns=['Stage', 'Seconds', 'Rows', 'Memory Delta', 'Rerun', 'Ended At'])
+
+    def stage_summary(self):
+        """Per-stage count, p50/p90/p99/max milliseconds, mean rows and mean memory delta (MB)"""
+        samples = self.samples()
+        if samples.empty:
+            return pd.DataFrame(columns=['Calls', 'p50 ms', 'p90 ms', 'p99 ms', 'Max ms', 'Mean rows', 'Mean Δ MB'])
+        rows = []
+        for stage, group in samples.groupby('Stage', sort=False):
+            ms = group['Seconds'].to_numpy() * 1000
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+            rows.append({
+                'Stage': stage,
+                'Calls': len(group),
+                'p50 ms': p50,
+                'p90 ms': p90,
+                'p99 ms': p99,
+                'Max ms': ms.max(),
+                'Mean rows': pd.to_numeric(group['Rows'], errors='coerce').mean(),
+                'Mean Δ MB': pd.to_numeric(group['Memory Delta'], errors='coerce').mean() / 2 ** 20,
+            })
+        return pd.DataFrame(rows).set_index('Stage').sort_values('p90 ms', ascending=False)
+
+    def slowest_reruns(self, n=10):
+        """The n slowest recent reruns with their top stages"""
+        with self._lock:
+            reruns = sorted(self._reruns, key=lambda r: r['seconds'], reverse=True)[:n]
+        return pd.DataFrame([{
+            'Page': r['page'],
+            'Started': pd.Timestamp.fromtimestamp(r['started_at']).strftime('%H:%M:%S'),
+            'Total ms': r['seconds'] * 1000,
+            'Top stages': ', '.join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in
+                                    sorted(r['stages'].items(), key=lambda item: item[1], reverse=True)[:3]),
+        } for r in reruns])
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._reruns.clear()
+
+perf = PerfRecorder()
+timed = perf.timed
+span = perf.span
+
+class Profiler:
+    """One-shot profiler: pyinstrument when installed, otherwise cProfile"""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler as PyinstrumentProfiler
+            self.backend = 'pyinstrument'
+            self._profiler = PyinstrumentProfiler()
+        except ImportError:
+            import cProfile
+            self.backend = 'cProfile'
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.backend == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        return self
+
+    def stop(self):
+        """Stop and return a plain-text report"""
+        if self.backend == 'pyinstrument':
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True)
+        import pstats
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(40)
+        return out.getvalue()
@@ -0,0 +1,104 @@
+"""
+Stale-while-revalidate holder for the loaded dashboard data
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class BackgroundRefresher:
+    """Serves the last good value immediately and refreshes it on a background thread
+
+    `fetch(publish, force_full)` must return a fresh value; it may also call
+    `publish(value)` later from another thread when it learns of newer data
+    (e.g. after serving a local snapshot). `force_full` is True for refreshes
+    requested with it, which should reload everything rather than a delta. Concurrent refresh requests share one in-flight fetch,
+    and readers only ever see a complete value swapped in by reference.
+    If `version_of(value)` is given, values older than the current one are
+    ignored, so a late snapshot can never replace fresher data. The first
+    `get()` returns as soon as anything is published, so a fetch that
+    publishes partial values early (e.g. while streaming) unblocks readers.
+    """
+
+    def __init__(self, fetch, ttl=300, version_of=None):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.version_of = version_of
+        self.last_error = None
+        self._value = None
+        self._updated_at = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # notified on publish and when a fetch ends
+        self._inflight = None  # threading.Event set when the running fetch finishes
+        self._inflight_full = False
+        self._queued_full = None  # Event of a forced fetch waiting for the running one
+
+    @property
+    def age(self):
+        """Seconds since the current value was published (None before the first load)"""
+        return None if self._updated_at is None else time.time() - self._updated_at
+
+    @property
+    def refreshing(self):
+        return self._inflight is not None
+
+    def publish(self, value):
+        with self._lock:
+            if (self.version_of is not None and self._value is not None
+                    and self.version_of(value) < self.version_of(self._value)):
+                return
+            self._value = value
+            self._updated_at = time.time()
+            self.last_error = None
+            self._changed.notify_all()
+
+    def _start(self, done, force_full):
+        threading.Thread(target=self._run, args=(done, force_full), daemon=True).start()
+
+    def _run(self, done, force_full):
+        try:
+            self.publish(self.fetch(self.publish, force_full))
+        except Exception as e:
+            logger.warning("Data refresh failed: %s", e)
+            self.last_error = str(e)
+        finally:
+            with self._lock:
+                # A forced refresh requested meanwhile runs next
+                queued, self._queued_full = self._queued_full, None
+                self._inflight, self._inflight_full = queued, queued is not None
+                self._changed.notify_all()
+            done.set()
+            if queued is not None:
+                self._start(queued, True)
+
+    def request_refresh(self, force_full=False):
+        """Start a background fetch unless one is already running; returns its completion event
+
+        With `force_full` a running delta fetch doesn't count: a full one is
+        queued behind it (shared by every forced request until it starts).
+        """
+        with self._lock:
+            if self._inflight is None:
+                done = self._inflight = threading.Event()
+                self._inflight_full = force_full
+            elif force_full and not self._inflight_full:
+                if self._queued_full is None:
+                    self._queued_full = threading.Event()
+                return self._queued_full
+            else:
+                return self._inflight
+        self._start(done, force_full)
+        return done
+
+    def get(self, timeout=None):
+        """Current value; blocks only on the very first load, otherwise never waits"""
+        value = self._value
+        if value is None:
+            done = self.request_refresh()
+            with self._changed:
+                self._changed.wait_for(lambda: self._value is not None or self._inflight is not done, timeout)
+            return self._value
+        if self.age is not None and self.age > self.ttl:
+            self.request_refresh()
+        return value
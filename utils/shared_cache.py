@@ -0,0 +1,323 @@
+"""
+Cross-process cache of normalized sheet frames for replicas running side by side
+
+Frames are stored as uncompressed Arrow IPC files so readers decode them
+without parsing; a generation manifest tells replicas when to pick up a new
+set, and a lease makes sure only one replica at a time refreshes from Sheets.
+What replicas share is the Sheets fetch and the normalization: each one still
+converts the frames into its own pandas memory.
+
+    cache = open_shared_cache('/dev/shm/emg')        # files (tmpfs = shared memory)
+    cache = open_shared_cache('redis://cache:6379/0') # needs the redis package
+    cache = open_shared_cache('memory://')            # in-process stand-in for Redis
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import pyarrow as pa
+from utils.perf import span
+
+MANIFEST_KEY = 'manifest.json'
+SYNC_LEASE = 'sync'
+# Counter the generation numbers are allocated from, so two writers never share one
+GENERATION_KEY = 'generation'
+# Frame generations kept besides the current one, for readers still fetching the previous set
+KEEP_GENERATIONS = 1
+
+def _frame_key(name, generation):
+    return f"frame.{generation}.{name.replace('/', '_')}.arrow"
+
+class FileCacheBackend:
+    """Keys as files in one directory, shared by every process on the host
+
+    Point it at tmpfs (/dev/shm) for a shared-memory store. Values are written
+    to a temp file and renamed, and read back memory-mapped, so readers never
+    see partial writes. Leases and counters are small files updated under an
+    flock.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """Memory-mapped contents as a pyarrow Buffer (None if missing)"""
+        try:
+            return pa.memory_map(self._path(key)).read_buffer()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(memoryview(data))
+        os.replace(tmp_path, path)
+
+    def delete(self, key):
+        # Processes that still map the file keep their pages until they drop them
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def incr(self, key):
+        """Add one to the integer counter at `key` -> the new value"""
+        path = self._path(key)
+        with self._locked(key):
+            try:
+                with open(path) as f:
+                    value = int(f.read())
+            except (FileNotFoundError, ValueError):
+                value = 0
+            with open(path, 'w') as f:
+                f.write(str(value + 1))
+        return value + 1
+
+    @contextmanager
+    def _locked(self, key):
+        import fcntl  # Unix only; imported here so the module loads everywhere
+        with open(self._path(f"{key}.lock"), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def acquire(self, key, owner, seconds):
+        """Take (or extend) the lease on `key` unless another owner holds an unexpired one"""
+        path = self._path(f"{key}.lease")
+        with self._locked(key):
+            try:
+                with open(path) as f:
+                    lease = json.load(f)
+            except (FileNotFoundError, ValueError):
+                lease = None
+            if lease and lease['owner'] != owner and lease['expires'] > time.time():
+                return False
+            with open(path, 'w') as f:
+                json.dump({'owner': owner, 'expires': time.time() + seconds}, f)
+            return True
+
+    def release(self, key, owner):
+        path = self._path(f"{key}.lease")
+        with self._locked(key):
+            try:
+                with open(path) as f:
+                    if json.load(f)['owner'] != owner:
+                        return
+            except (FileNotFoundError, ValueError):
+                return
+            os.remove(path)
+
+class RedisCacheBackend:
+    """Keys in a Redis-compatible store (redis-py client or LocalRedis)
+
+    Leases are SET NX PX keys, so a crashed holder's lease simply expires.
+    """
+
+    def __init__(self, client, prefix='emg:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return pa.py_buffer(value) if value is not None else None
+
+    def put(self, key, data):
+        self.client.set(self.prefix + key, bytes(memoryview(data)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return int(self.client.incr(self.prefix + key))
+
+    def acquire(self, key, owner, seconds):
+        lease_key = f"{self.prefix}{key}.lease"
+        if self.client.set(lease_key, owner, nx=True, px=int(seconds * 1000)):
+            return True
+        holder = self.client.get(lease_key)
+        if holder is not None and _text(holder) == owner:
+            self.client.set(lease_key, owner, px=int(seconds * 1000))
+            return True
+        return False
+
+    def release(self, key, owner):
+        # Not atomic, but the worst case is dropping a lease that was about to expire anyway
+        lease_key = f"{self.prefix}{key}.lease"
+        holder = self.client.get(lease_key)
+        if holder is not None and _text(holder) == owner:
+            self.client.delete(lease_key)
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+class LocalRedis:
+    """In-process stand-in for the few Redis commands RedisCacheBackend uses
+
+    Only shares data between threads of one process; use the file backend or
+    a real Redis for several replicas.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._live(key) else None
+
+    def set(self, key, value, nx=False, px=None):
+        with self._lock:
+            if nx and self._live(key):
+                return None
+            self._data[key] = value.encode() if isinstance(value, str) else bytes(value)
+            if px is not None:
+                self._expires[key] = time.time() + px / 1000
+            else:
+                self._expires.pop(key, None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._expires.pop(key, None)
+            return int(self._data.pop(key, None) is not None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._data[key]) + 1 if self._live(key) else 1
+            self._data[key] = str(value).encode()
+            return value
+
+class SharedFrameCache:
+    """Generations of {sheet name: DataFrame} plus their sync state in a backend
+
+    `write` stores every frame under a newly allocated generation and then
+    swaps the manifest, so readers always get one consistent set. `lease()`
+    is held by the single process refreshing from Sheets (renewed with
+    `acquire` while it fetches); everyone else calls `wait_for` and reads
+    what it publishes.
+    """
+
+    def __init__(self, backend, lease_seconds=120):
+        self.backend = backend
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def manifest(self):
+        """{'generation', 'fetched_at', 'names', 'states'} of the current set (None if empty)"""
+        data = self.backend.get(MANIFEST_KEY)
+        if data is None:
+            return None
+        try:
+            return json.loads(data.to_pybytes())
+        except ValueError:
+            return None
+
+    def read(self, manifest=None):
+        """Frames of the current (or given) generation -> {name: DataFrame}, or None if incomplete"""
+        manifest = manifest or self.manifest()
+        if manifest is None:
+            return None
+        frames = {}
+        with span('shared_cache.read') as info:
+            for name in manifest['names']:
+                data = self.backend.get(_frame_key(name, manifest['generation']))
+                if data is None:
+                    return None
+                # The table references the backend's buffer; the pandas conversion copies it into this process
+                table = pa.ipc.open_file(data).read_all()
+                frames[name] = table.to_pandas(split_blocks=True)
+            info['rows'] = sum(len(df) for df in frames.values())
+        return frames
+
+    def write(self, frames, fetched_at, states):
+        """Publish a new generation of frames; returns its number (None if a newer one got there first)"""
+        previous = self.manifest()
+        # Allocated atomically, so a writer whose lease lapsed can't overwrite another's frames
+        generation = self.backend.incr(GENERATION_KEY)
+        while previous and generation <= previous['generation']:
+            generation = self.backend.incr(GENERATION_KEY)  # counter lost or reset behind the manifest
+        with span('shared_cache.write', rows=sum(len(df) for df in frames.values())):
+            for name, df in frames.items():
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                sink = pa.BufferOutputStream()
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+                self.backend.put(_frame_key(name, generation), sink.getvalue())
+            # Generations aren't contiguous, so the manifest lists the older ones still kept
+            retained = []
+            if previous:
+                retained = [{'generation': previous['generation'], 'names': previous['names']}]
+                retained += previous.get('retained', [])
+            manifest = {'generation': generation, 'fetched_at': fetched_at, 'names': list(frames), 'states': states,
+                        'retained': retained[:KEEP_GENERATIONS]}
+            current = self.manifest()
+            if current is not None and current['generation'] > generation:
+                # A later writer already published; drop these frames rather than roll readers back
+                for name in frames:
+                    self.backend.delete(_frame_key(name, generation))
+                return None
+            self.backend.put(MANIFEST_KEY, json.dumps(manifest).encode())
+        for stale in retained[KEEP_GENERATIONS:]:
+            for name in stale['names']:
+                self.backend.delete(_frame_key(name, stale['generation']))
+        return generation
+
+    def acquire(self):
+        return self.backend.acquire(SYNC_LEASE, self.owner, self.lease_seconds)
+
+    def release(self):
+        self.backend.release(SYNC_LEASE, self.owner)
+
+    @contextmanager
+    def lease(self):
+        """Yields True if this process now holds the sync lease, False if another one does"""
+        acquired = self.acquire()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release()
+
+    def wait_for(self, generation, timeout, poll=0.2):
+        """Block until a generation newer than `generation` is published -> its manifest (None on timeout)"""
+        deadline = time.time() + timeout
+        with span('shared_cache.wait'):
+            while True:
+                manifest = self.manifest()
+                if manifest is not None and manifest['generation'] > (generation or 0):
+                    return manifest
+                if time.time() >= deadline:
+                    return None
+                time.sleep(poll)
+
+def open_shared_cache(url, lease_seconds=120):
+    """SharedFrameCache for 'memory://', 'redis://…'/'rediss://…', or a directory ('file://…' or a plain path)"""
+    if url.startswith('memory://'):
+        backend = RedisCacheBackend(LocalRedis())
+    elif url.startswith(('redis://', 'rediss://')):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("A redis:// shared cache needs the 'redis' package (pip install redis)") from e
+        backend = RedisCacheBackend(redis.Redis.from_url(url))
+    else:
+        backend = FileCacheBackend(url[len('file://'):] if url.startswith('file://') else url)
+    return SharedFrameCache(backend, lease_seconds)
@@ -0,0 +1,52 @@
+"""
+On-disk Parquet snapshots of normalized sheet data for instant cold starts
+"""
+import json
+import os
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Bump whenever the normalized frame layout changes so old snapshots are ignored
+SNAPSHOT_SCHEMA_VERSION = 3
+
+SNAPSHOT_DIR = os.environ.get(
+    'EMG_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'snapshots')
+)
+
+def _snapshot_path(name, directory=None):
+    return os.path.join(directory or SNAPSHOT_DIR, f"{name}.parquet")
+
+def save_snapshot(name, df, fetched_at=None, sync_state=None, directory=None):
+    """Write a normalized DataFrame to disk atomically with version/timestamp metadata"""
+    path = _snapshot_path(name, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'emg_schema_version'] = str(SNAPSHOT_SCHEMA_VERSION).encode()
+    metadata[b'emg_fetched_at'] = str(fetched_at if fetched_at is not None else time.time()).encode()
+    metadata[b'emg_sync_state'] = json.dumps(sync_state or {}).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write to a temp file and rename so readers never see a half-written snapshot
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+def load_snapshot(name, directory=None):
+    """Memory-map a snapshot -> (DataFrame, fetched_at, sync_state), or None if unusable"""
+    path = _snapshot_path(name, directory)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = pq.read_table(path, memory_map=True)
+        metadata = table.schema.metadata or {}
+        if metadata.get(b'emg_schema_version') != str(SNAPSHOT_SCHEMA_VERSION).encode():
+            return None
+        fetched_at = float(metadata.get(b'emg_fetched_at', b'0'))
+        sync_state = json.loads(metadata.get(b'emg_sync_state', b'{}'))
+        return table.to_pandas(), fetched_at, sync_state
+    except (OSError, ValueError, pa.ArrowException):
+        return None
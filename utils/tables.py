@@ -0,0 +1,146 @@
+"""
+Server-side paginated tables backed by presorted indexes built once per data load
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.money import AMOUNT_COLUMN, CENTS_PER_DOLLAR, display_frame
+from utils.perf import span
+
+SORTABLE_COLUMNS = ['Date', AMOUNT_COLUMN]
+PAGE_SIZES = [25, 50, 100, 250]
+
+class TableIndex:
+    """Presorted row orders plus category codes for one frame
+
+    Queries combine boolean masks (date/amount ranges via searchsorted on the
+    presorted orders, categories via integer codes) and then walk the
+    presorted order for the chosen column, so no sort happens per rerun.
+    """
+
+    def __init__(self, df):
+        self.n = len(df)
+        self._orders = {}
+        self._sorted_values = {}
+        self._missing = {}
+        for column in SORTABLE_COLUMNS:
+            if column in df.columns:
+                # Nullable cents become float (exact below 2**53) so missing values can sort last as NaN
+                values = df[column].to_numpy(dtype='float64', na_value=np.nan) if column == AMOUNT_COLUMN else df[column].to_numpy()
+                order = np.argsort(values, kind='stable')  # NaN/NaT sort last
+                self._orders[column] = order
+                self._sorted_values[column] = values[order]
+                self._missing[column] = int(pd.isna(values).sum())
+        self._codes = {}
+        self._categories = {}
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                self._codes[column] = df[column].cat.codes.to_numpy()
+                self._categories[column] = list(df[column].cat.categories)
+
+    def categories(self, column):
+        return self._categories.get(column, [])
+
+    def value_range(self, column):
+        """(min, max) of the non-missing values of a sortable column, or None"""
+        values = self._sorted_values.get(column)
+        if values is None or not len(values):
+            return None
+        valid = values[:len(values) - self._missing[column]]
+        return (valid[0], valid[-1]) if len(valid) else None
+
+    def _range_mask(self, column, low, high):
+        mask = np.zeros(self.n, dtype=bool)
+        values = self._sorted_values[column]
+        start = np.searchsorted(values, low, side='left') if low is not None else 0
+        end = np.searchsorted(values, high, side='right') if high is not None else len(values) - self._missing[column]
+        mask[self._orders[column][start:end]] = True
+        return mask
+
+    def query(self, sort_by='Date', ascending=False, filters=None, date_range=None, amount_range=None, subset=None):
+        """Row positions matching the filters, in sort order
+
+        `filters` maps categorical columns to allowed values; `subset` restricts
+        to given row positions (e.g. a location index); `amount_range` is in cents.
+        """
+        mask = np.ones(self.n, dtype=bool)
+        if subset is not None:
+            mask = np.zeros(self.n, dtype=bool)
+            mask[subset] = True
+        for column, allowed in (filters or {}).items():
+            if column not in self._codes:
+                continue
+            allowed = set(allowed)
+            allowed_codes = [i for i, value in enumerate(self._categories[column]) if value in allowed]
+            mask &= np.isin(self._codes[column], allowed_codes)
+        if date_range is not None and 'Date' in self._orders:
+            mask &= self._range_mask('Date', *date_range)
+        if amount_range is not None and AMOUNT_COLUMN in self._orders:
+            mask &= self._range_mask(AMOUNT_COLUMN, *amount_range)
+
+        order = self._orders.get(sort_by)
+        if order is None:
+            positions = np.flatnonzero(mask)
+            return positions if ascending else positions[::-1]
+        if not ascending:
+            # Descending, but keep missing values at the end
+            missing = self._missing[sort_by]
+            order = np.concatenate([order[:len(order) - missing][::-1], order[len(order) - missing:]])
+        return order[mask[order]]
+
+def render_table(df, index, key, filters=None, subset=None, sort_by='Date', ascending=False, decorate=None):
+    """Render one page of `df` with doctor/date/amount filters; only the visible window is sent"""
+    with st.expander("🔎 Filter & sort"):
+        c1, c2, c3 = st.columns(3)
+        chosen_filters = dict(filters or {})
+        doctors = index.categories('Doctor')
+        if doctors:
+            picked = c1.multiselect("Doctor", doctors, key=f"{key}_doctor")
+            if picked:
+                chosen_filters['Doctor'] = picked
+
+        date_range = None
+        dates = index.value_range('Date')
+        if dates is not None:
+            lo, hi = pd.Timestamp(dates[0]).date(), pd.Timestamp(dates[1]).date()
+            picked = c2.date_input("Date range", (lo, hi), min_value=lo, max_value=hi, key=f"{key}_dates")
+            if isinstance(picked, (tuple, list)) and len(picked) == 2 and tuple(picked) != (lo, hi):
+                date_range = (np.datetime64(picked[0]), np.datetime64(pd.Timestamp(picked[1]) + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')))
+
+        amount_range = None
+        amounts = index.value_range(AMOUNT_COLUMN)
+        if amounts is not None:
+            lo, hi = amounts[0] / CENTS_PER_DOLLAR, amounts[1] / CENTS_PER_DOLLAR
+            low = c3.number_input("Min amount", value=lo, key=f"{key}_min")
+            high = c3.number_input("Max amount", value=hi, key=f"{key}_max")
+            if (low, high) != (lo, hi):
+                amount_range = (round(low * CENTS_PER_DOLLAR), round(high * CENTS_PER_DOLLAR))
+
+        sortable = [column for column in SORTABLE_COLUMNS if column in df.columns]
+        s1, s2, s3 = st.columns(3)
+        if sortable:
+            sort_by = s1.selectbox("Sort by", sortable, index=sortable.index(sort_by) if sort_by in sortable else 0,
+                                   format_func=lambda column: 'Amount' if column == AMOUNT_COLUMN else column, key=f"{key}_sort")
+            ascending = s2.radio("Order", ["Descending", "Ascending"], index=int(ascending), horizontal=True, key=f"{key}_order") == "Ascending"
+        page_size = s3.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_size")
+
+    with span('table.query') as info:
+        positions = index.query(sort_by, ascending, chosen_filters, date_range, amount_range, subset)
+        info['rows'] = len(positions)
+    total = len(positions)
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        # Filters shrank the result below the remembered page
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"{key}_page") if pages > 1 else 1
+    start = (page - 1) * page_size
+    window = df.take(positions[start:start + page_size])
+    if decorate is not None:
+        window = decorate(window)
+    # Cents become dollars only for the rows actually shown
+    window = display_frame(window)
+
+    with span('table.render', rows=len(window)):
+        st.dataframe(window, use_container_width=True, hide_index=True)
+    st.caption(f"Showing {min(start + 1, total):,}–{min(start + page_size, total):,} of {total:,} rows" + (f" · page {page} of {pages}" if pages > 1 else ""))
+    return total
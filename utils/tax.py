@@ -0,0 +1,238 @@
+"""
+Multi-year tax estimates from fiscal-period rollups of income and deductible expenses
+"""
+import numpy as np
+import pandas as pd
+from utils.money import AMOUNT_COLUMN, CENTS_PER_DOLLAR, Money
+from utils.perf import timed
+
+# Bracket tables (dollars): (upper bounds of all but the top bracket, rate per bracket).
+# Figures are the published indexed amounts; years without a table use the
+# latest one available. Estimates only: no credits beyond the basic personal
+# amount and CPP, no RRSP, no other income.
+FEDERAL_BRACKETS = {
+    2023: ([53_359, 106_717, 165_430, 235_675], [0.15, 0.205, 0.26, 0.29, 0.33]),
+    2024: ([55_867, 111_733, 173_205, 246_752], [0.15, 0.205, 0.26, 0.29, 0.33]),
+    # Lowest rate fell to 14% on July 1, 2025; 14.5% is the blended rate for the year
+    2025: ([57_375, 114_750, 177_882, 253_414], [0.145, 0.205, 0.26, 0.29, 0.33]),
+}
+FEDERAL_BASIC_PERSONAL = {2023: 15_000, 2024: 15_705, 2025: 16_129}
+
+ONTARIO_BRACKETS = {
+    2023: ([49_231, 98_463, 150_000, 220_000], [0.0505, 0.0915, 0.1116, 0.1216, 0.1316]),
+    2024: ([51_446, 102_894, 150_000, 220_000], [0.0505, 0.0915, 0.1116, 0.1216, 0.1316]),
+    2025: ([52_886, 105_775, 150_000, 220_000], [0.0505, 0.0915, 0.1116, 0.1216, 0.1316]),
+}
+ONTARIO_BASIC_PERSONAL = {2023: 11_865, 2024: 12_399, 2025: 12_747}
+# Surtax: 20% of Ontario tax above the first threshold plus 36% above the second
+ONTARIO_SURTAX = {2023: (5_315, 6_802), 2024: (5_554, 7_108), 2025: (5_710, 7_307)}
+
+# Ontario Health Premium: (income where a step starts, rate, premium cap after the step)
+ONTARIO_HEALTH_PREMIUM = [(20_000, 0.06, 300), (36_000, 0.06, 450), (48_000, 0.25, 600), (72_000, 0.25, 750), (200_000, 0.25, 900)]
+
+# Self-employed CPP: both the employee and employer shares
+# (basic exemption, YMPE, base rate, YAMPE, second-tier rate)
+CPP = {
+    2023: (3_500, 66_600, 0.119, None, 0.0),
+    2024: (3_500, 68_500, 0.119, 73_200, 0.08),
+    2025: (3_500, 71_300, 0.119, 81_200, 0.08),
+}
+
+# Share of each expense category that is deductible (meals and entertainment are 50%)
+DEDUCTIBLE_SHARE = {'Meals': 0.5, 'Entertainment': 0.5}
+
+# CRA instalment due dates (month, day); required when net tax owing exceeds the threshold
+INSTALLMENT_DATES = [(3, 15), (6, 15), (9, 15), (12, 15)]
+INSTALLMENT_THRESHOLD = 3_000
+
+def _table_year(table, year):
+    """The table's entry for `year`, falling back to the nearest available year"""
+    known = sorted(table)
+    return year if year in table else (known[-1] if year > known[-1] else known[0])
+
+def bracket_tax(incomes, bounds, rates):
+    """Progressive tax for an array of incomes (vectorized over incomes and brackets)"""
+    incomes = np.maximum(np.asarray(incomes, dtype='float64'), 0)
+    lower = np.concatenate([[0.0], bounds])
+    upper = np.concatenate([bounds, [np.inf]])
+    taxable = np.clip(incomes[..., None] - lower, 0, upper - lower)
+    return taxable @ np.asarray(rates)
+
+def cpp_contributions(net_income, year):
+    """Self-employed CPP (base + second tier) for an array of net self-employment incomes"""
+    exemption, ympe, rate, yampe, rate2 = CPP[_table_year(CPP, year)]
+    net_income = np.asarray(net_income, dtype='float64')
+    base = np.clip(net_income, 0, ympe)
+    contributions = np.where(base > exemption, (base - exemption) * rate, 0.0)
+    if yampe is not None:
+        contributions = contributions + np.clip(net_income - ympe, 0, yampe - ympe) * rate2
+    return contributions
+
+def ontario_health_premium(taxable):
+    taxable = np.asarray(taxable, dtype='float64')
+    premium = np.zeros_like(taxable)
+    previous_cap = 0
+    for start, rate, cap in ONTARIO_HEALTH_PREMIUM:
+        step = np.minimum(np.maximum(taxable - start, 0) * rate, cap - previous_cap)
+        premium += step
+        previous_cap = cap
+    return premium
+
+def estimate_tax(net_income, year):
+    """Federal + Ontario tax, surtax, health premium and CPP for an array of net incomes -> dict of arrays
+
+    Half of CPP (the employer share) is deducted from income and the other half
+    is credited at the lowest bracket rates.
+    """
+    net_income = np.maximum(np.asarray(net_income, dtype='float64'), 0)
+    cpp = cpp_contributions(net_income, year)
+    taxable = np.maximum(net_income - cpp / 2, 0)
+
+    fed_bounds, fed_rates = FEDERAL_BRACKETS[_table_year(FEDERAL_BRACKETS, year)]
+    federal_credits = (FEDERAL_BASIC_PERSONAL[_table_year(FEDERAL_BASIC_PERSONAL, year)] + cpp / 2) * fed_rates[0]
+    federal = np.maximum(bracket_tax(taxable, fed_bounds, fed_rates) - federal_credits, 0)
+
+    on_bounds, on_rates = ONTARIO_BRACKETS[_table_year(ONTARIO_BRACKETS, year)]
+    ontario_credits = (ONTARIO_BASIC_PERSONAL[_table_year(ONTARIO_BASIC_PERSONAL, year)] + cpp / 2) * on_rates[0]
+    ontario_basic = np.maximum(bracket_tax(taxable, on_bounds, on_rates) - ontario_credits, 0)
+    first, second = ONTARIO_SURTAX[_table_year(ONTARIO_SURTAX, year)]
+    surtax = 0.20 * np.maximum(ontario_basic - first, 0) + 0.36 * np.maximum(ontario_basic - second, 0)
+    ontario = ontario_basic + surtax + ontario_health_premium(taxable)
+
+    total = federal + ontario + cpp
+    return {
+        'taxable': taxable,
+        'federal': federal,
+        'ontario': ontario,
+        'cpp': cpp,
+        'total': total,
+        'effective_rate': np.divide(total, net_income, out=np.zeros_like(total), where=net_income > 0),
+    }
+
+def _fiscal_periods(dates, fiscal_start_month):
+    """(fiscal year, fiscal quarter 1-4) arrays; the fiscal year is named after the calendar year it ends in"""
+    months = (dates.dt.month - fiscal_start_month) % 12
+    years = dates.dt.year + ((dates.dt.month >= fiscal_start_month) & (fiscal_start_month != 1)).astype(int)
+    return years, months // 3 + 1
+
+def _estimate_entry(result, column):
+    """One column of estimate_tax's arrays as Money amounts plus the effective rate"""
+    entry = {name: Money.from_dollars(values[column]) for name, values in result.items() if name != 'effective_rate'}
+    entry['effective_rate'] = float(result['effective_rate'][column])
+    return entry
+
+def _split_evenly(cents, parts):
+    base, remainder = divmod(int(cents), parts)
+    return np.array([base + (i < remainder) for i in range(parts)], dtype=np.int64)
+
+class TaxRollups:
+    """Income and deductible expenses per fiscal year and quarter, with tax estimates per year
+
+    Built once per data load; `period(year, quarter)` and `estimate(year)` are
+    dict lookups. Quarter None means the whole year. For the current
+    (incomplete) year the estimate is also given for the annualized run rate,
+    which is what installments should be based on. Rollups are exact cents
+    (Money); the bracket math runs in dollars and is rounded back to cents.
+    """
+
+    def __init__(self, payments, expenses, fiscal_start_month=1, today=None):
+        self.fiscal_start_month = fiscal_start_month
+        today = pd.Timestamp(today) if today is not None else pd.Timestamp.now()
+        self._periods = {}
+        self._categories = {}
+
+        income = self._rollup(payments)
+        deductible = self._rollup(expenses, deductible=True)
+        spent = self._rollup(expenses)
+        if not expenses.empty and {'Category', AMOUNT_COLUMN, 'Date'} <= set(expenses.columns):
+            dated = expenses[expenses['Date'].notna()]
+            years, quarters = _fiscal_periods(dated['Date'], fiscal_start_month)
+            by_category = dated.groupby([years.rename('Year'), quarters.rename('Quarter'), dated['Category'].astype(str)])[AMOUNT_COLUMN].sum()
+            for (year, quarter, category), amount in by_category.items():
+                for key in ((int(year), int(quarter)), (int(year), None)):
+                    self._categories.setdefault(key, {}).setdefault(category, 0)
+                    self._categories[key][category] += int(amount)
+
+        keys = sorted(set(income) | set(spent), key=lambda key: (key[0], key[1] or 0))
+        for key in keys:
+            self._periods[key] = {
+                'income': Money(income.get(key, 0)),
+                'expenses': Money(spent.get(key, 0)),
+                'deductible': Money(deductible.get(key, 0)),
+                'net': Money(income.get(key, 0) - deductible.get(key, 0)),
+            }
+        self.years = sorted({year for year, _ in self._periods})
+
+        # One vectorized estimate per year over [actual net, annualized net]
+        current_fiscal_year = int(_fiscal_periods(pd.Series([today]), fiscal_start_month)[0].iloc[0])
+        months_elapsed = (today.month - fiscal_start_month) % 12 + today.day / today.days_in_month
+        self._estimates = {}
+        for year in self.years:
+            net = self._periods[(year, None)]['net'].dollars
+            annualized = net * 12 / months_elapsed if year == current_fiscal_year and months_elapsed > 0 else net
+            result = estimate_tax([net, annualized], year)
+            self._estimates[year] = {
+                'actual': _estimate_entry(result, 0),
+                'annualized': _estimate_entry(result, 1),
+                'complete': year < current_fiscal_year,
+            }
+
+    def _rollup(self, df, deductible=False):
+        """{(year, quarter): cents} plus (year, None) yearly totals"""
+        if df.empty or not {'Date', AMOUNT_COLUMN} <= set(df.columns):
+            return {}
+        dated = df[df['Date'].notna()]
+        amounts = dated[AMOUNT_COLUMN].fillna(0)
+        if deductible and 'Category' in dated.columns:
+            shares = dated['Category'].astype(str).map(DEDUCTIBLE_SHARE).fillna(1.0).to_numpy()
+            # Partly deductible items are rounded to the cent individually, as they'd be claimed
+            amounts = pd.Series(np.rint(amounts.to_numpy(dtype='int64') * shares).astype(np.int64), index=amounts.index)
+        years, quarters = _fiscal_periods(dated['Date'], self.fiscal_start_month)
+        quarterly = amounts.groupby([years.rename('Year'), quarters.rename('Quarter')]).sum()
+        rollup = {(int(year), int(quarter)): int(total) for (year, quarter), total in quarterly.items()}
+        for (year, _), total in quarterly.items():
+            rollup[(int(year), None)] = rollup.get((int(year), None), 0) + int(total)
+        return rollup
+
+    def period(self, year, quarter=None):
+        """{'income', 'expenses', 'deductible', 'net'} as Money for a fiscal year or one of its quarters"""
+        return self._periods.get((year, quarter), {name: Money(0) for name in ('income', 'expenses', 'deductible', 'net')})
+
+    def categories(self, year, quarter=None):
+        """Expenses by category for the period in cents, largest first"""
+        return pd.Series(self._categories.get((year, quarter), {}), dtype='int64').sort_values(ascending=False)
+
+    def estimate(self, year, annualized=False):
+        """Tax estimate for a fiscal year: Money amounts plus effective_rate (see estimate_tax)
+
+        `annualized` projects an incomplete year from its run rate.
+        """
+        entry = self._estimates.get(year)
+        if entry is None:
+            return {**{name: Money(0) for name in ('taxable', 'federal', 'ontario', 'cpp', 'total')}, 'effective_rate': 0.0}
+        return entry['annualized' if annualized else 'actual']
+
+    def is_complete(self, year):
+        return self._estimates.get(year, {}).get('complete', False)
+
+    def installments(self, year):
+        """Quarterly installment options for `year` -> DataFrame (Due, Current-year, Prior-year in cents)
+
+        Current-year is a quarter of this year's projected total; prior-year is
+        a quarter of last year's actual total, with leftover cents on the
+        earliest payments so each option sums exactly. Empty if neither exceeds
+        the CRA threshold.
+        """
+        projected = self.estimate(year, annualized=not self.is_complete(year))['total']
+        prior = self.estimate(year - 1)['total']
+        if max(projected, prior) <= INSTALLMENT_THRESHOLD * CENTS_PER_DOLLAR:
+            return pd.DataFrame(columns=['Due', 'Current-year', 'Prior-year'])
+        return pd.DataFrame({
+            'Due': [pd.Timestamp(year, month, day).date() for month, day in INSTALLMENT_DATES],
+            'Current-year': _split_evenly(projected, len(INSTALLMENT_DATES)),
+            'Prior-year': _split_evenly(prior, len(INSTALLMENT_DATES)),
+        })
+
+@timed('tax.build')
+def build_tax_rollups(payments, expenses, fiscal_start_month=1):
+    return TaxRollups(payments, expenses, fiscal_start_month)